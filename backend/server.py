@@ -1,30 +1,585 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, Request, Response, BackgroundTasks
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, DeleteOne, IndexModel, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import DuplicateKeyError, OperationFailure
 import os
+import re
+import csv
+import json
+import asyncio
 import logging
+import logging.handlers
+import multiprocessing
+import queue
+import random
+import contextvars
+from contextlib import contextmanager
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Tuple
 import uuid
-from datetime import datetime, timedelta
+import time
+import threading
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
 import qrcode
+import heapq
+import bisect
+import textwrap
+import unicodedata
+from PIL import Image, ImageDraw, ImageFont
 from io import BytesIO
-import base64
+import hashlib
 import bcrypt
 import jwt
+import orjson
+import pandas as pd
 from enum import Enum
-import shutil
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Metrics
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EVENT_LOOP_LAG_INTERVAL = 0.5
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+class Metrics:
+    """Prometheus-style metrics, rendered in the text exposition format.
+
+    Mongo timings are recorded from pymongo's monitoring threads, hence the lock.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.requests = Counter()
+        self.request_durations = {}
+        self.mongo_durations = {}
+        self.mongo_failures = Counter()
+        self.loop_lag = Histogram()
+        self.loop_lag_last = 0.0
+
+    def observe_request(self, method: str, route: str, status: int, duration: float):
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            self.request_durations.setdefault((method, route), Histogram()).observe(duration)
+
+    def observe_mongo(self, collection: str, command: str, duration: float, failed: bool):
+        with self._lock:
+            self.mongo_durations.setdefault((collection, command), Histogram()).observe(duration)
+            if failed:
+                self.mongo_failures[(collection, command)] += 1
+
+    def observe_loop_lag(self, lag: float):
+        with self._lock:
+            self.loop_lag.observe(lag)
+            self.loop_lag_last = lag
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP stockify_http_requests_total HTTP requests by route template and status.",
+                "# TYPE stockify_http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f'stockify_http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+            
+            lines += [
+                "# HELP stockify_http_request_duration_seconds HTTP request latency by route template.",
+                "# TYPE stockify_http_request_duration_seconds histogram",
+            ]
+            for (method, route), histogram in sorted(self.request_durations.items()):
+                lines += histogram.render("stockify_http_request_duration_seconds", f'method="{method}",route="{route}"')
+            
+            lines += [
+                "# HELP stockify_mongo_command_duration_seconds MongoDB command latency by collection and command.",
+                "# TYPE stockify_mongo_command_duration_seconds histogram",
+            ]
+            for (collection, command), histogram in sorted(self.mongo_durations.items()):
+                lines += histogram.render("stockify_mongo_command_duration_seconds", f'collection="{collection}",command="{command}"')
+            
+            lines += [
+                "# HELP stockify_mongo_command_failures_total Failed MongoDB commands by collection and command.",
+                "# TYPE stockify_mongo_command_failures_total counter",
+            ]
+            for (collection, command), count in sorted(self.mongo_failures.items()):
+                lines.append(f'stockify_mongo_command_failures_total{{collection="{collection}",command="{command}"}} {count}')
+            
+            lines += [
+                "# HELP stockify_event_loop_lag_seconds Delay of the event loop in waking up a sleeping task.",
+                "# TYPE stockify_event_loop_lag_seconds histogram",
+            ]
+            lines += self.loop_lag.render("stockify_event_loop_lag_seconds", "")
+            lines += [
+                "# TYPE stockify_event_loop_lag_last_seconds gauge",
+                f"stockify_event_loop_lag_last_seconds {self.loop_lag_last}",
+            ]
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics(METRICS_ENABLED)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command sent by the shared client, per collection and command name."""
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        if not metrics.enabled:
+            return
+        collection = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        self._pending[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ""
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool):
+        collection = self._pending.pop((event.connection_id, event.request_id), None)
+        if collection is not None:
+            metrics.observe_mongo(collection, event.command_name, event.duration_micros / 1e6, failed)
+
+class MetricsMiddleware:
+    """Plain ASGI middleware recording request count and latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            return await self.app(scope, receive, send)
+        
+        start = time.perf_counter()
+        status = 500
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            metrics.observe_request(scope["method"], path, status, time.perf_counter() - start)
+
+async def monitor_event_loop_lag():
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(EVENT_LOOP_LAG_INTERVAL)
+        metrics.observe_loop_lag(max(0.0, loop.time() - start - EVENT_LOOP_LAG_INTERVAL))
+
+# Tracing
+TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'false').lower() == 'true'
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0.05))
+TRACE_MAX_SPANS = int(os.environ.get('TRACE_MAX_SPANS', 512))
+TRACE_FILE = Path(os.environ.get('TRACE_FILE', ROOT_DIR / 'traces' / 'traces.jsonl'))
+TRACE_FILE_MAX_BYTES = int(os.environ.get('TRACE_FILE_MAX_BYTES', 50 * 1024 * 1024))
+TRACE_FILE_BACKUPS = int(os.environ.get('TRACE_FILE_BACKUPS', 5))
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+current_span = contextvars.ContextVar("current_span", default=None)
+
+def otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+class Span:
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: dict, kind: int = 1):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start = time.time_ns()
+        self.end_time = None
+        self.error = None
+
+    def child(self, name: str, attributes: dict, kind: int = 1) -> "Span":
+        return Span(self.trace, name, self.span_id, attributes, kind)
+
+    def set_error(self, error: str):
+        self.error = error
+
+    def end(self):
+        self.end_time = time.time_ns()
+        self.trace.add(self)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end_time),
+            "attributes": [{"key": key, "value": otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+class Trace:
+    """Finished spans of one sampled request; Mongo spans are added from Motor's worker threads."""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans = []
+        self.dropped = 0
+        self.closed = False
+
+    def add(self, span: Span):
+        if self.closed:
+            return
+        if len(self.spans) >= TRACE_MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append(span)
+
+    def to_otlp(self) -> dict:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "stockify-backend"}}]},
+            "scopeSpans": [{"scope": {"name": "stockify"}, "spans": [span.to_otlp() for span in self.spans]}],
+        }]}
+
+class TraceExporter:
+    """Writes one OTLP/JSON document per trace to a rotating file from a background thread."""
+
+    def __init__(self, path: Path, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.queue = queue.SimpleQueue()
+        self.listener = None
+        self.exported = 0
+
+    def start(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=self.max_bytes, backupCount=self.backups, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.listener = logging.handlers.QueueListener(self.queue, handler)
+        self.listener.start()
+
+    def export(self, trace: Trace):
+        if self.listener is None:
+            return
+        message = orjson.dumps(trace.to_otlp()).decode()
+        self.queue.put(logging.makeLogRecord({"msg": message, "levelno": logging.INFO, "levelname": "INFO"}))
+        self.exported += 1
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+trace_exporter = TraceExporter(TRACE_FILE, TRACE_FILE_MAX_BYTES, TRACE_FILE_BACKUPS)
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """Open a child span of the current one; a no-op when the request is not sampled."""
+    parent = current_span.get()
+    if parent is None:
+        yield None
+        return
+    span = parent.child(name, attributes)
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set_error(type(e).__name__)
+        raise
+    finally:
+        current_span.reset(token)
+        span.end()
+
+class MongoCommandTracer(monitoring.CommandListener):
+    """Adds a client span per Mongo command; Motor copies the caller's context into its worker thread."""
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        parent = current_span.get()
+        if parent is None:
+            return
+        collection = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        attributes = {"db.system": "mongodb", "db.name": event.database_name, "db.operation": event.command_name}
+        if isinstance(collection, str):
+            attributes["db.mongodb.collection"] = collection
+        span = parent.child(f"mongo.{event.command_name}", attributes, kind=3)
+        self._pending[(event.connection_id, event.request_id)] = span
+
+    def succeeded(self, event):
+        span = self._pending.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.end()
+
+    def failed(self, event):
+        span = self._pending.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.set_error(str(event.failure.get("errmsg", "command failed")))
+            span.end()
+
+class TracingMiddleware:
+    """Opens a root span per sampled request and exports the finished trace.
+
+    An incoming W3C ``traceparent`` header is honoured: its trace id is reused
+    and its sampled flag overrides TRACE_SAMPLE_RATE.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def sample(self, scope) -> Tuple[Optional[str], Optional[str]]:
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                match = TRACEPARENT_PATTERN.match(value.decode("latin-1"))
+                if match:
+                    trace_id, parent_id, flags = match.groups()
+                    return (trace_id, parent_id) if int(flags, 16) & 1 else (None, None)
+        if random.random() < TRACE_SAMPLE_RATE:
+            return os.urandom(16).hex(), None
+        return None, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING_ENABLED:
+            return await self.app(scope, receive, send)
+        trace_id, parent_id = self.sample(scope)
+        if trace_id is None:
+            return await self.app(scope, receive, send)
+        
+        trace = Trace(trace_id)
+        span = Span(trace, scope["method"], parent_id, {"http.method": scope["method"], "http.target": scope["path"]}, kind=2)
+        
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                span.attributes["http.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    span.set_error(f"HTTP {message['status']}")
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-trace-id", trace_id.encode())]
+            await send(message)
+        
+        token = current_span.set(span)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except BaseException as e:
+            span.set_error(type(e).__name__)
+            raise
+        finally:
+            current_span.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                span.name = f"{scope['method']} {route}"
+                span.attributes["http.route"] = route
+            span.end_time = time.time_ns()
+            if trace.dropped:
+                span.attributes["stockify.dropped_spans"] = trace.dropped
+            trace.closed = True
+            trace.spans.append(span)
+            trace_exporter.export(trace)
+
+# Slow queries
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+SLOW_QUERY_MAX_SHAPES = int(os.environ.get('SLOW_QUERY_MAX_SHAPES', 500))
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "findAndModify"}
+COMMAND_SESSION_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+current_scope = contextvars.ContextVar("current_scope", default=None)
+
+def redact_shape(value):
+    """Replace every literal in a filter or pipeline by "?", keeping operators and field paths."""
+    if isinstance(value, dict):
+        return {key: redact_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shape = redact_shape(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+def command_shape(command_name: str, command: dict) -> dict:
+    if command_name == "aggregate":
+        return {"pipeline": redact_shape(command.get("pipeline", []))}
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        return {"filter": redact_shape(statements[0].get("q", {}))}
+    shape = {"filter": redact_shape(command.get("filter", command.get("query", {})))}
+    if command.get("sort"):
+        shape["sort"] = dict(command["sort"])
+    return shape
+
+def find_explain_section(explain, key: str):
+    """First value stored under ``key`` anywhere in an explain document (aggregate nests it under stages)."""
+    if isinstance(explain, dict):
+        if key in explain:
+            return explain[key]
+        children = explain.values()
+    elif isinstance(explain, list):
+        children = explain
+    else:
+        return None
+    for child in children:
+        found = find_explain_section(child, key)
+        if found is not None:
+            return found
+    return None
+
+class SlowQueryLog(monitoring.CommandListener):
+    """Records commands slower than SLOW_QUERY_MS, deduplicated by route, collection and redacted shape.
+
+    The first occurrence of a shape is explained with ``executionStats`` on the
+    event loop to capture the plan and the documents examined vs returned.
+    """
+
+    def __init__(self, threshold_ms: float, max_shapes: int):
+        self.threshold_ms = threshold_ms
+        self.max_shapes = max_shapes
+        self.loop = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def started(self, event):
+        if event.command_name == "explain":
+            return
+        collection = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        if not isinstance(collection, str):
+            return
+        self._pending[(event.connection_id, event.request_id)] = (
+            collection, event.database_name, dict(event.command), current_scope.get()
+        )
+
+    def succeeded(self, event):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is not None and event.duration_micros / 1000 >= self.threshold_ms:
+            self.record(event.command_name, event.duration_micros / 1000, *pending)
+
+    def failed(self, event):
+        self._pending.pop((event.connection_id, event.request_id), None)
+
+    def record(self, command_name: str, duration_ms: float, collection: str, database: str, command: dict, scope):
+        route = getattr(scope.get("route"), "path", None) if scope else None
+        route = f"{scope['method']} {route or scope['path']}" if scope else "background"
+        shape = command_shape(command_name, command)
+        key = (route, collection, command_name, json.dumps(shape, sort_keys=True, default=str))
+        now = datetime.utcnow()
+        
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry["count"] += 1
+                entry["total_ms"] += duration_ms
+                entry["max_ms"] = max(entry["max_ms"], duration_ms)
+                entry["last_seen"] = now
+                self.entries.move_to_end(key)
+                return
+            entry = {
+                "route": route, "collection": collection, "command": command_name, "shape": shape,
+                "count": 1, "total_ms": duration_ms, "max_ms": duration_ms, "first_seen": now, "last_seen": now,
+                "docs_examined": None, "keys_examined": None, "docs_returned": None, "plan": None,
+            }
+            self.entries[key] = entry
+            if len(self.entries) > self.max_shapes:
+                self.entries.popitem(last=False)
+        
+        logger.warning(f"Slow query {duration_ms:.0f}ms on {collection}.{command_name} from {route}: {key[3]}")
+        if SLOW_QUERY_EXPLAIN and command_name in EXPLAINABLE_COMMANDS and self.loop is not None:
+            explain_command = {k: v for k, v in command.items() if not k.startswith("$") and k not in COMMAND_SESSION_FIELDS}
+            self.loop.call_soon_threadsafe(asyncio.ensure_future, self.explain(entry, database, explain_command))
+
+    async def explain(self, entry: dict, database: str, command: dict):
+        try:
+            explain = await client[database].command({"explain": command, "verbosity": "executionStats"})
+        except Exception as e:
+            entry["plan"] = {"error": str(e)}
+            return
+        stats = find_explain_section(explain, "executionStats") or {}
+        winning_plan = find_explain_section(explain, "winningPlan") or {}
+        entry["docs_examined"] = stats.get("totalDocsExamined")
+        entry["keys_examined"] = stats.get("totalKeysExamined")
+        entry["docs_returned"] = stats.get("nReturned")
+        # Stage and index names only: the raw plan carries filter literals and index bounds
+        entry["plan"] = {"stages": plan_stages(winning_plan), "indexes": plan_indexes(winning_plan)}
+
+    def report(self) -> List[dict]:
+        with self._lock:
+            entries = [dict(entry) for entry in self.entries.values()]
+        entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return entries
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_MAX_SHAPES)
+
+class SlowQueryMiddleware:
+    """Keeps the ASGI scope in a context variable so slow commands can be attributed to their route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandMetrics(), MongoCommandTracer(), slow_query_log])
 db = client[os.environ['DB_NAME']]
 
 # Create the main app without a prefix
@@ -38,15 +593,179 @@ SECRET_KEY = "stockify-secret-key-2025"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Dashboard counters document, rebuilt from scratch when missing or older than this
+DASHBOARD_COUNTERS_ID = "dashboard"
+DASHBOARD_COUNTERS_MAX_AGE = timedelta(seconds=float(os.environ.get('DASHBOARD_COUNTERS_MAX_AGE', 3600)))
+EXPIRATION_WINDOW = timedelta(days=30)
+
+# Materialized alerts
+ALERTS_PAGE_SIZE = 100
+ALERTS_SWEEP_INTERVAL = float(os.environ.get('ALERTS_SWEEP_INTERVAL', 3600))
+
+# Live event push (Server-Sent Events)
+EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 100))
+EVENTS_HEARTBEAT = float(os.environ.get('EVENTS_HEARTBEAT', 15))
+
+# Run multi-document writes (demande approval) in a transaction; requires a replica set
+MONGO_TRANSACTIONS = os.environ.get('MONGO_TRANSACTIONS', 'false').lower() == 'true'
+
+# Audit log writes are queued and flushed in batches
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 100))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 1.0))
+AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', 10000))
+
+# Historique entries older than this are moved to compressed Parquet files
+historique_archive_dir = ROOT_DIR / "archive" / "historique"
+historique_archive_dir.mkdir(parents=True, exist_ok=True)
+HISTORIQUE_ARCHIVE_AFTER = timedelta(days=float(os.environ.get('HISTORIQUE_ARCHIVE_AFTER_DAYS', 90)))
+HISTORIQUE_ARCHIVE_INTERVAL = float(os.environ.get('HISTORIQUE_ARCHIVE_INTERVAL', 86400))
+HISTORIQUE_ARCHIVE_CHUNK = 50000
+# Lease held by the worker running an archival, renewed after every chunk
+HISTORIQUE_ARCHIVE_LEASE_TTL = timedelta(seconds=float(os.environ.get('HISTORIQUE_ARCHIVE_LEASE_TTL', 600)))
+HISTORIQUE_PAGE_SIZE = 100
+
+# Read-through cache of serialized article responses
+ARTICLES_CACHE_SIZE = int(os.environ.get('ARTICLES_CACHE_SIZE', 256))
+ARTICLES_CACHE_TTL = float(os.environ.get('ARTICLES_CACHE_TTL', 300))
+# How often each worker re-reads collection versions bumped by other workers and CLIs
+VERSION_REFRESH_INTERVAL = float(os.environ.get('VERSION_REFRESH_INTERVAL', 1))
+
+# Article search
+SEARCH_PAGE_SIZE = 20
+SEARCH_FUZZY_THRESHOLD = 0.3
+SEARCH_REFRESH_INTERVAL = float(os.environ.get('SEARCH_REFRESH_INTERVAL', 5))
+SEARCH_REFRESH_OVERLAP = timedelta(seconds=float(os.environ.get('SEARCH_REFRESH_OVERLAP', 10)))
+SEARCH_RECONCILE_INTERVAL = float(os.environ.get('SEARCH_RECONCILE_INTERVAL', 60))
+
+# Pagination
+ARTICLES_PAGE_SIZE = 1000
+
 # Security
 security = HTTPBearer()
 
+# Password hashing pool (bcrypt releases the GIL)
+BCRYPT_POOL_SIZE = int(os.environ.get('BCRYPT_POOL_SIZE', min(4, os.cpu_count() or 1)))
+bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_POOL_SIZE, thread_name_prefix="bcrypt")
+
+# Authenticated user cache. No handler modifies or deletes users, and changes made
+# from the CLIs or other workers cannot reach it, so the TTL bounds how long a
+# role change or deletion takes to apply to existing tokens.
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 60))
+
 # Create uploads directory if it doesn't exist
 uploads_dir = ROOT_DIR / "uploads"
 uploads_dir.mkdir(exist_ok=True)
+thumbnails_dir = uploads_dir / "thumbs"
+thumbnails_dir.mkdir(exist_ok=True)
+
+# Uploads are stored content-addressed by their SHA-256
+MAX_UPLOAD_SIZE = int(os.environ.get('MAX_UPLOAD_SIZE', 10 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 256 * 1024
+THUMBNAIL_SIZES = (200, 400)
+CONTENT_ADDRESSED_NAME = re.compile(r"^[0-9a-f]{64}(_\d+)?(\.\w+)?$")
+
+# Rendered QR codes are cached in memory and written through to disk, where files
+# older than QR_CACHE_TTL (e.g. left behind by renamed articles) are pruned hourly
+qr_cache_dir = ROOT_DIR / "cache" / "qr"
+qr_cache_dir.mkdir(parents=True, exist_ok=True)
+QR_CACHE_SIZE = int(os.environ.get('QR_CACHE_SIZE', 512))
+QR_CACHE_TTL = float(os.environ.get('QR_CACHE_TTL', 86400))
+QR_CACHE_PRUNE_INTERVAL = float(os.environ.get('QR_CACHE_PRUNE_INTERVAL', 3600))
+
+# QR rendering is CPU bound: run it in worker processes, started from a fork server
+# rather than forked from this process and its Motor, bcrypt and exporter threads
+QR_POOL_SIZE = int(os.environ.get('QR_POOL_SIZE', os.cpu_count() or 1))
+
+def new_qr_executor() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=QR_POOL_SIZE, mp_context=multiprocessing.get_context("forkserver"))
+
+qr_executor = new_qr_executor()
+
+# Label sheets: A4 at 150 dpi
+LABEL_PAGE_SIZE = (1240, 1754)
+LABEL_COLUMNS = 3
+LABEL_ROWS = 7
+LABELS_PER_PAGE = LABEL_COLUMNS * LABEL_ROWS
+MAX_LABELS = 1000
+
+# Bulk demande processing
+MAX_BULK_DEMANDES = 1000
+
+# Bulk imports are validated and written in batches
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_ERRORS = 1000
+
+class UploadStaticFiles(StaticFiles):
+    """Content-addressed files never change, so they can be cached forever."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if CONTENT_ADDRESSED_NAME.match(Path(full_path).name):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
 
 # Serve static files
-app.mount("/uploads", StaticFiles(directory=str(uploads_dir)), name="uploads")
+app.mount("/uploads", UploadStaticFiles(directory=str(uploads_dir)), name="uploads")
+
+# Indexes required by the hot query paths, created idempotently at startup
+INDEXES = {
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "articles": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("date_expiration", ASCENDING)]),
+        IndexModel([("updated_at", ASCENDING)]),
+    ],
+    "demandes": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING)]),
+    ],
+    "mouvements": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("created_at", DESCENDING)]),
+    ],
+    "alerts": [
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("type", ASCENDING)]),
+    ],
+    "historique_actions": [
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("action", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("cible_type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+}
+
+# Query shapes issued by each route, checked by the index advisor. Shapes marked
+# expected_scan cannot use an index and are reported without failing the check.
+QUERY_SHAPES = [
+    {"route": "POST /api/auth/login", "collection": "users", "filter": {"email": ""}},
+    {"route": "get_current_user", "collection": "users", "filter": {"id": ""}},
+    {"route": "GET /api/articles", "collection": "articles", "filter": {}, "sort": [("created_at", 1), ("id", 1)]},
+    {"route": "GET /api/articles/{article_id}", "collection": "articles", "filter": {"id": ""}},
+    {"route": "GET /api/demandes", "collection": "demandes", "filter": {"user_id": ""}},
+    {"route": "PUT /api/demandes/{demande_id}/approve", "collection": "demandes", "filter": {"id": ""}},
+    {"route": "GET /api/mouvements", "collection": "mouvements", "filter": {}, "sort": [("created_at", -1)]},
+    {"route": "GET /api/historique", "collection": "historique_actions", "filter": {},
+     "sort": [("created_at", -1), ("id", -1)]},
+    {"route": "GET /api/historique (user)", "collection": "historique_actions", "filter": {"user_id": ""},
+     "sort": [("created_at", -1), ("id", -1)]},
+    {"route": "GET /api/historique (action)", "collection": "historique_actions", "filter": {"action": ""},
+     "sort": [("created_at", -1), ("id", -1)]},
+    {"route": "GET /api/historique (cible_type)", "collection": "historique_actions", "filter": {"cible_type": ""},
+     "sort": [("created_at", -1), ("id", -1)]},
+    {"route": "GET /api/dashboard/alerts", "collection": "alerts", "filter": {}, "sort": [("created_at", -1), ("_id", -1)]},
+    {"route": "sweep_expiring_alerts", "collection": "articles",
+     "filter": {"date_expiration": {"$lte": datetime(2000, 1, 31), "$gte": datetime(2000, 1, 1)}}},
+    {"route": "search_index_refresher", "collection": "articles", "filter": {"updated_at": {"$gte": datetime(2000, 1, 1)}}},
+    {"route": "rebuild_alerts (low stock, startup only)", "collection": "articles",
+     "filter": {"$expr": {"$lte": ["$quantite", "$quantite_min"]}}, "expected_scan": True},
+]
 
 # Enums
 class UserRole(str, Enum):
@@ -62,6 +781,22 @@ class MouvementType(str, Enum):
     ENTREE = "entree"
     SORTIE = "sortie"
 
+class BulkDecision(str, Enum):
+    APPROVE = "approve"
+    REJECT = "reject"
+
+class ImportKind(str, Enum):
+    ARTICLES = "articles"
+    MOUVEMENTS = "mouvements"
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class LabelFormat(str, Enum):
+    PNG = "png"
+    PDF = "pdf"
+
 # Models
 class User(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -94,6 +829,7 @@ class Article(BaseModel):
     nom: str
     description: str
     image: Optional[str] = None
+    thumbnail: Optional[str] = None
     code_qr: Optional[str] = None
     quantite: int
     quantite_min: int
@@ -113,6 +849,7 @@ class ArticleResponse(BaseModel):
     nom: str
     description: str
     image: Optional[str]
+    thumbnail: Optional[str] = None
     code_qr: Optional[str]
     quantite: int
     quantite_min: int
@@ -182,6 +919,438 @@ class AlerteItem(BaseModel):
     message: str
     created_at: datetime
 
+class BulkDemandeItem(BaseModel):
+    id: str
+    decision: BulkDecision
+
+class BulkDemandeRequest(BaseModel):
+    items: List[BulkDemandeItem]
+
+class BulkDemandeResult(BaseModel):
+    id: str
+    decision: BulkDecision
+    success: bool
+    detail: Optional[str] = None
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire ``ttl`` seconds after insertion."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+class EventBroker:
+    """In-process fan-out of events to SSE subscribers.
+
+    Each subscriber has a bounded queue. A subscriber that falls behind is
+    disconnected rather than slowing publishers down; EventSource clients
+    reconnect automatically.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.published = 0
+        self.disconnected = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, event_type: str, data: dict):
+        # Encode once, whatever the number of subscribers
+        message = f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+        self.published += 1
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.unsubscribe(queue)
+                self.disconnected += 1
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "disconnected": self.disconnected,
+        }
+
+event_broker = EventBroker(EVENTS_QUEUE_SIZE)
+
+class AuditLogWriter:
+    """Batches ``historique_actions`` inserts off the request path.
+
+    Records are flushed with ``insert_many`` once ``batch_size`` are queued or
+    ``flush_interval`` seconds after the first one. The queue is bounded: when
+    it is full, ``put`` waits instead of dropping audit records.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, queue_size: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.task = None
+        self.flushed = 0
+        self.failed = 0
+        self.flushes = 0
+        self.total_flush_time = 0.0
+        self.last_flush_time = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued and stop the writer."""
+        if self.running:
+            await self.queue.put(None)
+            await self.task
+        self.task = None
+
+    async def put(self, record: dict):
+        if self.running:
+            await self.queue.put(record)
+        else:
+            # Scripts that never start the writer log synchronously
+            await self._write([record])
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            record = await self.queue.get()
+            if record is None:
+                return
+            batch = [record]
+            deadline = loop.time() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+            await self._write(batch)
+            if stop:
+                return
+
+    async def _write(self, batch: List[dict]):
+        start = time.perf_counter()
+        try:
+            await db.historique_actions.insert_many(batch, ordered=False)
+            self.flushed += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception(f"Could not write {len(batch)} audit log entries")
+        self.last_flush_time = time.perf_counter() - start
+        self.total_flush_time += self.last_flush_time
+        self.flushes += 1
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "batch_size": self.batch_size,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_time * 1000,
+            "avg_flush_ms": self.total_flush_time / self.flushes * 1000 if self.flushes else 0.0,
+        }
+
+audit_log = AuditLogWriter(AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL, AUDIT_QUEUE_SIZE)
+
+def normalize_text(text: str) -> str:
+    """Lowercase and strip accents so that "Câble" matches "cable"."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"\w+", normalize_text(text))
+
+def trigrams(token: str, prefix: bool = False) -> set:
+    # Anchored at the start so 1-2 letter prefixes still have trigrams
+    padded = "$$" + token if prefix else "$$" + token + "$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchIndex:
+    """In-process trigram index over article ``nom`` and ``description``.
+
+    Query terms are first matched against the vocabulary (distinct words),
+    through a trigram index, by prefix or by trigram similarity for typos.
+    Matching words are then expanded to articles through per-field postings.
+    Every query term must match. The index lives in the worker process: its
+    own write handlers update it directly, and ``search_index_refresher`` picks
+    up writes made by other workers and CLIs from Mongo.
+    """
+
+    FIELD_WEIGHTS = (2.0, 1.0)
+
+    def __init__(self):
+        self.articles = {}
+        self.postings = ({}, {})
+        self.vocabulary = Counter()
+        self.grams = {}
+
+    def __len__(self):
+        return len(self.articles)
+
+    def add(self, article: dict):
+        fields = (set(tokenize(article.get("nom"))), set(tokenize(article.get("description"))))
+        if self.articles.get(article["id"]) == fields:
+            return
+        self.remove(article["id"])
+        self.articles[article["id"]] = fields
+        for postings, tokens in zip(self.postings, fields):
+            for token in tokens:
+                postings.setdefault(token, set()).add(article["id"])
+                if self.vocabulary[token] == 0:
+                    for gram in trigrams(token):
+                        self.grams.setdefault(gram, set()).add(token)
+                self.vocabulary[token] += 1
+
+    def remove(self, article_id: str):
+        fields = self.articles.pop(article_id, None)
+        if fields is None:
+            return
+        for postings, tokens in zip(self.postings, fields):
+            for token in tokens:
+                postings[token].discard(article_id)
+                if not postings[token]:
+                    del postings[token]
+                self.vocabulary[token] -= 1
+                if self.vocabulary[token] == 0:
+                    del self.vocabulary[token]
+                    for gram in trigrams(token):
+                        self.grams[gram].discard(token)
+                        if not self.grams[gram]:
+                            del self.grams[gram]
+
+    def clear(self):
+        self.__init__()
+
+    def _match_words(self, term: str) -> dict:
+        """Vocabulary words matching ``term``: 1.0 for a prefix match, else trigram similarity."""
+        term_grams = trigrams(term)
+        candidates = set()
+        for gram in term_grams | trigrams(term, prefix=True):
+            candidates |= self.grams.get(gram, set())
+        
+        words = {}
+        for token in candidates:
+            if token.startswith(term):
+                words[token] = 1.0
+                continue
+            token_grams = trigrams(token)
+            similarity = len(term_grams & token_grams) / len(term_grams | token_grams)
+            if similarity >= SEARCH_FUZZY_THRESHOLD:
+                words[token] = similarity
+        return words
+
+    def _match_term(self, term: str) -> dict:
+        words = self._match_words(term)
+        scores = {}
+        for postings, weight in zip(self.postings, self.FIELD_WEIGHTS):
+            for token, similarity in words.items():
+                score = similarity * weight
+                for article_id in postings.get(token, ()):
+                    if scores.get(article_id, 0) < score:
+                        scores[article_id] = score
+        return scores
+
+    def search(self, query: str, limit: int) -> List[str]:
+        """Ids of the best matching articles, best first."""
+        scores = None
+        for term in tokenize(query):
+            term_scores = self._match_term(term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {article_id: scores[article_id] + score for article_id, score in term_scores.items() if article_id in scores}
+            if not scores:
+                return []
+        if not scores:
+            return []
+        return heapq.nsmallest(limit, scores, key=lambda article_id: (-scores[article_id], article_id))
+
+search_index = SearchIndex()
+
+SEARCH_PROJECTION = {"_id": 0, "id": 1, "nom": 1, "description": 1, "updated_at": 1}
+
+async def rebuild_search_index():
+    search_index.clear()
+    async for article in db.articles.find({}, SEARCH_PROJECTION):
+        search_index.add(article)
+    logger.info(f"Search index built with {len(search_index)} articles")
+
+async def refresh_search_index(since: datetime) -> datetime:
+    """Index articles updated since ``since`` (minus an overlap for in-flight writes); returns the new mark."""
+    newest = since
+    async for article in db.articles.find({"updated_at": {"$gte": since - SEARCH_REFRESH_OVERLAP}}, SEARCH_PROJECTION):
+        search_index.add(article)
+        newest = max(newest, article["updated_at"])
+    return newest
+
+async def reconcile_search_index():
+    """Drop deleted articles and add ones written with an old ``updated_at`` (imports, generated data)."""
+    ids = {article["id"] async for article in db.articles.find({}, {"_id": 0, "id": 1})}
+    for article_id in set(search_index.articles) - ids:
+        search_index.remove(article_id)
+    missing = list(ids - set(search_index.articles))
+    if missing:
+        async for article in db.articles.find({"id": {"$in": missing}}, SEARCH_PROJECTION):
+            search_index.add(article)
+
+async def search_index_refresher(since: datetime):
+    last_reconcile = time.monotonic()
+    while True:
+        await asyncio.sleep(SEARCH_REFRESH_INTERVAL)
+        try:
+            since = await refresh_search_index(since)
+            if time.monotonic() - last_reconcile >= SEARCH_RECONCILE_INTERVAL:
+                await reconcile_search_index()
+                last_reconcile = time.monotonic()
+        except Exception:
+            logger.exception("Search index refresh failed")
+
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+qr_cache = TTLCache(QR_CACHE_SIZE, QR_CACHE_TTL)
+articles_cache = TTLCache(ARTICLES_CACHE_SIZE, ARTICLES_CACHE_TTL)
+
+class CollectionVersion:
+    """Version of a collection, bumped by everything that writes to it.
+
+    Kept in the ``counters`` collection so that writes from other workers and
+    from the CLIs invalidate ETags too. The random epoch is set when the
+    document is created, so ETags never match again after it is reset.
+
+    Each worker keeps a copy that its own bumps update immediately and
+    ``collection_version_refresher`` re-reads every VERSION_REFRESH_INTERVAL,
+    so building an ETag costs no query: bumps from elsewhere are seen within
+    that interval.
+    """
+
+    def __init__(self, name: str):
+        self.id = f"version:{name}"
+        self.current = None
+
+    def update(self, version: Optional[dict]):
+        version = version or {"epoch": "0", "value": 0}
+        current = self.current
+        # A refresh that raced with a local bump must not roll the copy back
+        if current is None or version["epoch"] != current["epoch"] or version["value"] > current["value"]:
+            self.current = {"epoch": version["epoch"], "value": version["value"]}
+
+    async def bump(self):
+        version = await db.counters.find_one_and_update(
+            {"_id": self.id},
+            {"$inc": {"value": 1}, "$setOnInsert": {"epoch": uuid.uuid4().hex[:8]}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self.update(version)
+
+    async def refresh(self):
+        self.update(await db.counters.find_one({"_id": self.id}))
+
+    async def etag(self, key: str) -> str:
+        if self.current is None:
+            await self.refresh()
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        return f'"{self.current["epoch"]}-{self.current["value"]}-{digest}"'
+
+articles_version = CollectionVersion("articles")
+
+async def collection_version_refresher():
+    while True:
+        await asyncio.sleep(VERSION_REFRESH_INTERVAL)
+        try:
+            await articles_version.refresh()
+        except Exception:
+            logger.exception("Collection version refresh failed")
+
+class Lease:
+    """Exclusive, expiring lease on a job, shared by every worker through the ``counters`` collection."""
+
+    def __init__(self, name: str, ttl: timedelta):
+        self.id = f"lease:{name}"
+        self.ttl = ttl
+        self.holder = uuid.uuid4().hex
+
+    async def acquire(self) -> bool:
+        """Take or renew the lease; False while another worker holds an unexpired one."""
+        now = datetime.utcnow()
+        try:
+            await db.counters.update_one(
+                {"_id": self.id, "$or": [{"holder": self.holder}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"holder": self.holder, "expires_at": now + self.ttl}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def release(self):
+        await db.counters.delete_one({"_id": self.id, "holder": self.holder})
+
+historique_archive_lease = Lease("historique_archive", HISTORIQUE_ARCHIVE_LEASE_TTL)
+
+class LabelSheetRequest(BaseModel):
+    article_ids: List[str]
+    format: LabelFormat = LabelFormat.PNG
+
 # Helper functions
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
@@ -189,6 +1358,66 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+class PoolMetrics:
+    """Queue depth and wait time of an executor, updated from worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.max_queued = 0
+        self.total_wait = 0.0
+
+    def submitted(self):
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+    def started(self, wait: float):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.total_wait += wait
+
+    def finished(self):
+        with self._lock:
+            self.running -= 1
+            self.completed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "max_queued": self.max_queued,
+                "avg_wait_ms": self.total_wait / self.completed * 1000 if self.completed else 0.0,
+            }
+
+bcrypt_metrics = PoolMetrics()
+
+async def run_in_bcrypt_pool(func, *args):
+    """Run a bcrypt call on the bounded pool so it never blocks the event loop."""
+    enqueued = time.perf_counter()
+    bcrypt_metrics.submitted()
+
+    def task():
+        bcrypt_metrics.started(time.perf_counter() - enqueued)
+        try:
+            return func(*args)
+        finally:
+            bcrypt_metrics.finished()
+
+    with trace_span(f"bcrypt.{func.__name__}"):
+        return await asyncio.get_running_loop().run_in_executor(bcrypt_executor, task)
+
+async def hash_password_async(password: str) -> str:
+    return await run_in_bcrypt_pool(hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await run_in_bcrypt_pool(verify_password, password, hashed)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -200,15 +1429,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await authenticate_token(credentials.credentials)
+
+async def authenticate_token(token: str) -> User:
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"id": user_id})
+        user = user_cache.get(user_id)
         if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        return User(**user)
+            user = await db.users.find_one({"id": user_id})
+            if user is None:
+                raise HTTPException(status_code=401, detail="User not found")
+            user = User(**user)
+            user_cache.set(user_id, user)
+        return user
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
@@ -217,7 +1453,7 @@ async def get_admin_user(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
 
-def generate_qr_code(data: str) -> str:
+def render_qr_png(data: str) -> bytes:
     qr = qrcode.QRCode(version=1, box_size=10, border=5)
     qr.add_data(data)
     qr.make(fit=True)
@@ -225,8 +1461,754 @@ def generate_qr_code(data: str) -> str:
     
     buffered = BytesIO()
     img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    return f"data:image/png;base64,{img_str}"
+    return buffered.getvalue()
+
+def render_label_page(labels: List[Tuple[str, str]]) -> bytes:
+    """Render one page of ``(qr data, name)`` labels as a PNG. Runs in a worker process."""
+    page = Image.new("RGB", LABEL_PAGE_SIZE, "white")
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=22)
+    cell_width = LABEL_PAGE_SIZE[0] // LABEL_COLUMNS
+    cell_height = LABEL_PAGE_SIZE[1] // LABEL_ROWS
+    qr_size = cell_height - 40
+    
+    for index, (data, nom) in enumerate(labels):
+        x = (index % LABEL_COLUMNS) * cell_width
+        y = (index // LABEL_COLUMNS) * cell_height
+        qr = Image.open(BytesIO(render_qr_png(data))).convert("RGB").resize((qr_size, qr_size))
+        page.paste(qr, (x + 10, y + 20))
+        draw.multiline_text((x + qr_size + 20, y + 40), "\n".join(textwrap.wrap(nom, 14)[:6]), fill="black", font=font)
+        draw.rectangle([x, y, x + cell_width - 1, y + cell_height - 1], outline="#cccccc")
+    
+    buffered = BytesIO()
+    page.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+def assemble_label_sheet(pages: List[bytes]) -> bytes:
+    """Combine rendered pages into a multi-page PDF. Runs in a worker process."""
+    images = [Image.open(BytesIO(page)).convert("RGB") for page in pages]
+    buffered = BytesIO()
+    images[0].save(buffered, format="PDF", save_all=True, append_images=images[1:], resolution=150)
+    return buffered.getvalue()
+
+async def run_in_qr_pool(func, *args):
+    """Run ``func`` in the QR pool, replacing the pool and retrying once if a worker died."""
+    global qr_executor
+    loop = asyncio.get_running_loop()
+    with trace_span(f"qr.{func.__name__}"):
+        executor = qr_executor
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            # Concurrent callers all see the same broken pool: only the first replaces it
+            if qr_executor is executor:
+                logger.warning("QR worker process died, restarting the pool")
+                qr_executor = new_qr_executor()
+                executor.shutdown(wait=False)
+            return await loop.run_in_executor(qr_executor, func, *args)
+
+def generate_thumbnails(source: Path, digest: str):
+    """Write the JPEG thumbnail variants of an uploaded image. Runs as a background task."""
+    try:
+        with Image.open(source) as image:
+            image = image.convert("RGB")
+            for size in THUMBNAIL_SIZES:
+                target = thumbnails_dir / f"{digest}_{size}.jpg"
+                if target.exists():
+                    continue
+                thumbnail = image.copy()
+                thumbnail.thumbnail((size, size))
+                tmp_path = target.with_suffix(".part")
+                thumbnail.save(tmp_path, format="JPEG", quality=85)
+                os.replace(tmp_path, target)
+    except OSError as e:
+        logger.warning(f"Could not generate thumbnails for {source.name}: {e}")
+
+# Stored extension per decoded image format, so the same bytes always get the same name
+IMAGE_SUFFIXES = {"JPEG": ".jpg", "MPO": ".jpg", "PNG": ".png", "GIF": ".gif", "WEBP": ".webp", "BMP": ".bmp"}
+
+def image_suffix(path: Path) -> Optional[str]:
+    """Extension for the image at ``path``, or None if PIL cannot decode it as a supported format."""
+    try:
+        with Image.open(path) as image:
+            image.verify()
+            return IMAGE_SUFFIXES.get(image.format)
+    except Exception:
+        return None
+
+async def save_upload(upload: UploadFile, background_tasks: BackgroundTasks) -> Tuple[str, str]:
+    """Stream an upload to disk under its SHA-256, returning ``(image, thumbnail)`` paths.
+
+    Files that PIL cannot decode are rejected, so the thumbnail path always resolves
+    once generated. The extension comes from the decoded format, not the client's
+    filename, so identical files are stored once; thumbnails are generated after
+    the response is sent.
+    """
+    tmp_path = uploads_dir / f".{uuid.uuid4()}.part"
+    digest = hashlib.sha256()
+    size = 0
+    buffer = await asyncio.to_thread(open, tmp_path, "wb")
+    try:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_UPLOAD_SIZE:
+                raise HTTPException(status_code=413, detail="Image too large")
+            digest.update(chunk)
+            await asyncio.to_thread(buffer.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(buffer.close)
+        tmp_path.unlink(missing_ok=True)
+        raise
+    await asyncio.to_thread(buffer.close)
+    
+    suffix = await asyncio.to_thread(image_suffix, tmp_path)
+    if suffix is None:
+        tmp_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="Invalid image file")
+    
+    digest = digest.hexdigest()
+    filename = digest + suffix
+    target = uploads_dir / filename
+    if target.exists():
+        tmp_path.unlink()
+    else:
+        os.replace(tmp_path, target)
+    
+    background_tasks.add_task(generate_thumbnails, target, digest)
+    return f"uploads/{filename}", f"uploads/thumbs/{digest}_{THUMBNAIL_SIZES[0]}.jpg"
+
+def qr_code_data(article: dict) -> str:
+    return f"ARTICLE:{article['id']}:{article['nom']}"
+
+def qr_code_url(article_id: str) -> str:
+    return f"/api/articles/{article_id}/qr.png"
+
+def qr_etag(data: str) -> str:
+    return f'"{hashlib.sha256(data.encode("utf-8")).hexdigest()}"'
+
+def read_cached_file(path: Path) -> Optional[bytes]:
+    try:
+        return path.read_bytes() or None
+    except FileNotFoundError:
+        return None
+
+def write_cached_file(path: Path, content: bytes):
+    """Write through a temporary file so concurrent readers never see a partial file."""
+    tmp_path = path.with_name(f".{uuid.uuid4()}.part")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+
+async def get_qr_png(data: str) -> bytes:
+    """Return the QR PNG for ``data`` from memory, then disk, rendering it only on a miss."""
+    key = hashlib.sha256(data.encode("utf-8")).hexdigest()
+    png = qr_cache.get(key)
+    if png is None:
+        path = qr_cache_dir / f"{key}.png"
+        png = await asyncio.to_thread(read_cached_file, path)
+        if png is None:
+            png = await run_in_qr_pool(render_qr_png, data)
+            await asyncio.to_thread(write_cached_file, path, png)
+        qr_cache.set(key, png)
+    return png
+
+def prune_qr_cache() -> int:
+    """Delete disk-cached QR codes, and leftover temporary files, older than QR_CACHE_TTL."""
+    cutoff = time.time() - QR_CACHE_TTL
+    pruned = 0
+    for path in qr_cache_dir.iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                pruned += 1
+        except FileNotFoundError:
+            pass
+    return pruned
+
+async def qr_cache_pruner():
+    while True:
+        try:
+            pruned = await asyncio.to_thread(prune_qr_cache)
+            if pruned:
+                logger.info(f"Pruned {pruned} cached QR codes")
+        except Exception:
+            logger.exception("QR cache pruning failed")
+        await asyncio.sleep(QR_CACHE_PRUNE_INTERVAL)
+
+async def migrate_inline_qr_codes() -> int:
+    """Replace base64 data URIs stored in ``code_qr`` by the QR endpoint URL."""
+    result = await db.articles.update_many(
+        {"code_qr": {"$regex": "^data:"}},
+        [{"$set": {"code_qr": {"$concat": ["/api/articles/", "$id", "/qr.png"]}}}]
+    )
+    if result.modified_count:
+        await articles_version.bump()
+    return result.modified_count
+
+async def fetch_names(collection, ids) -> dict:
+    """Resolve ``id -> nom`` for all referenced documents with a single ``$in`` query."""
+    ids = list({i for i in ids if i})
+    if not ids:
+        return {}
+    cursor = collection.find({"id": {"$in": ids}}, {"_id": 0, "id": 1, "nom": 1})
+    return {doc["id"]: doc.get("nom") async for doc in cursor}
+
+async def enrich_names(documents: List[dict], user_field: Optional[str] = None, article_field: Optional[str] = None) -> List[dict]:
+    """Fill ``user_nom``/``article_nom`` on every document.
+
+    Costs at most one query per referenced collection whatever the number of
+    documents, instead of one ``find_one`` per document.
+    """
+    lookups = []
+    if user_field:
+        lookups.append(fetch_names(db.users, (doc.get(user_field) for doc in documents)))
+    if article_field:
+        lookups.append(fetch_names(db.articles, (doc.get(article_field) for doc in documents)))
+    names = await asyncio.gather(*lookups)
+    user_names = names.pop(0) if user_field else {}
+    article_names = names.pop(0) if article_field else {}
+
+    for doc in documents:
+        if user_field:
+            doc["user_nom"] = user_names.get(doc.get(user_field))
+        if article_field:
+            doc["article_nom"] = article_names.get(doc.get(article_field))
+    return documents
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored dates are naive UTC; convert timezone-aware input so comparisons work."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def parse_keyset_cursor(after: str, key: str = "id", descending: bool = False) -> dict:
+    """Turn an ``<created_at>,<key>`` keyset cursor into a Mongo filter."""
+    try:
+        created_at, last_key = after.rsplit(",", 1)
+        created_at = naive_utc(datetime.fromisoformat(created_at))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    op = "$lt" if descending else "$gt"
+    return {"$or": [
+        {"created_at": {op: created_at}},
+        {"created_at": created_at, key: {op: last_key}},
+    ]}
+
+def keyset_cursor(document: dict, key: str = "id") -> str:
+    return f"{document['created_at'].isoformat()},{document[key]}"
+
+def parse_fields(fields: Optional[str], model) -> List[str]:
+    """Validate a ``?fields=`` sparse fieldset against a response model (all fields by default)."""
+    available = list(model.__fields__)
+    if not fields:
+        return available
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [field for field in requested if field != "id"]
+
+def projection(fields: List[str], *required: str) -> dict:
+    return {"_id": 0, **{field: 1 for field in list(fields) + list(required)}}
+
+def project_rows(rows: List[dict], fields: List[str]) -> List[dict]:
+    """Shape raw documents as response rows without building a Pydantic model per row."""
+    return [{field: row.get(field) for field in fields} for row in rows]
+
+async def cached_json_response(request: Request, cache: TTLCache, version: CollectionVersion, build):
+    """Serve ``build()`` through a version-keyed cache, answering 304 to a matching ETag.
+
+    ``build`` returns ``(content, headers)``; the serialized body and headers are cached.
+    """
+    etag = await version.etag(f"{request.url.path}?{request.url.query}")
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    entry = cache.get(etag)
+    if entry is None:
+        content, extra_headers = await build()
+        entry = (orjson.dumps(content, default=jsonable_encoder), extra_headers)
+        cache.set(etag, entry)
+    return Response(content=entry[0], media_type="application/json", headers={**headers, **entry[1]})
+
+async def stream_articles(cursor, fields: List[str]):
+    async for article in cursor:
+        yield orjson.dumps({field: article.get(field) for field in fields}) + b"\n"
+
+async def ensure_indexes():
+    for collection, indexes in INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            logger.error(f"Could not create indexes on {collection}: {e}")
+
+def plan_stages(plan: dict) -> List[str]:
+    """Flatten the stage names of an explain ``winningPlan`` tree."""
+    stages = [plan.get("stage")] if plan.get("stage") else []
+    for child in [plan.get("inputStage"), plan.get("queryPlan")] + plan.get("inputStages", []):
+        if child:
+            stages.extend(plan_stages(child))
+    return stages
+
+def plan_indexes(plan: dict) -> List[str]:
+    """Names of the indexes used anywhere in an explain ``winningPlan`` tree."""
+    indexes = [plan["indexName"]] if plan.get("indexName") else []
+    for child in [plan.get("inputStage"), plan.get("queryPlan")] + plan.get("inputStages", []):
+        if child:
+            indexes.extend(index for index in plan_indexes(child) if index not in indexes)
+    return indexes
+
+async def explain_query_shapes() -> List[dict]:
+    report = []
+    for shape in QUERY_SHAPES:
+        cursor = db[shape["collection"]].find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        explain = await cursor.explain()
+        stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+        report.append({
+            "route": shape["route"],
+            "collection": shape["collection"],
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+            "expected_scan": shape.get("expected_scan", False),
+        })
+    return report
+
+def is_low_stock(article: dict) -> bool:
+    return article["quantite"] <= article["quantite_min"]
+
+def is_expiring_soon(article: dict, now: datetime) -> bool:
+    expiration = article.get("date_expiration")
+    return expiration is not None and now <= expiration <= now + EXPIRATION_WINDOW
+
+def article_counter_deltas(before: Optional[dict], after: Optional[dict]) -> dict:
+    """Counter changes implied by an article going from ``before`` to ``after`` (None = absent)."""
+    now = datetime.utcnow()
+    
+    def flags(article):
+        if article is None:
+            return (0, 0, 0)
+        return (1, int(is_low_stock(article)), int(is_expiring_soon(article, now)))
+    
+    old, new = flags(before), flags(after)
+    return {
+        "total_articles": new[0] - old[0],
+        "articles_low_stock": new[1] - old[1],
+        "articles_expiring_soon": new[2] - old[2],
+    }
+
+async def update_dashboard_counters(deltas: dict):
+    deltas = {key: value for key, value in deltas.items() if value}
+    if deltas:
+        await db.counters.update_one({"_id": DASHBOARD_COUNTERS_ID}, {"$inc": deltas})
+
+async def rebuild_dashboard_counters() -> dict:
+    """Recompute every dashboard counter, the article ones in a single ``$facet`` pass."""
+    now = datetime.utcnow()
+    facets = await db.articles.aggregate([{"$facet": {
+        "total_articles": [{"$count": "n"}],
+        "articles_low_stock": [
+            {"$match": {"$expr": {"$lte": ["$quantite", "$quantite_min"]}}},
+            {"$count": "n"},
+        ],
+        "articles_expiring_soon": [
+            {"$match": {"date_expiration": {"$lte": now + EXPIRATION_WINDOW, "$gte": now}}},
+            {"$count": "n"},
+        ],
+    }}]).to_list(1)
+    counters = {key: value[0]["n"] if value else 0 for key, value in facets[0].items()}
+    counters["total_users"] = await db.users.count_documents({})
+    counters["total_demandes"] = await db.demandes.count_documents({})
+    counters["rebuilt_at"] = now
+    await db.counters.replace_one({"_id": DASHBOARD_COUNTERS_ID}, counters, upsert=True)
+    return counters
+
+def dashboard_counters_stale(counters: Optional[dict]) -> bool:
+    # The expiring-soon window moves with time, so periodically recount from scratch
+    return counters is None or counters["rebuilt_at"] < datetime.utcnow() - DASHBOARD_COUNTERS_MAX_AGE
+
+dashboard_rebuild_lock = asyncio.Lock()
+dashboard_rebuild_task = None
+
+async def refresh_dashboard_counters() -> dict:
+    """Rebuild the counters if still stale once the lock is held, so concurrent callers share one rebuild."""
+    async with dashboard_rebuild_lock:
+        counters = await db.counters.find_one({"_id": DASHBOARD_COUNTERS_ID})
+        if dashboard_counters_stale(counters):
+            counters = await rebuild_dashboard_counters()
+        return counters
+
+async def refresh_dashboard_counters_in_background():
+    try:
+        await refresh_dashboard_counters()
+    except Exception:
+        logger.exception("Dashboard counters rebuild failed")
+
+def schedule_dashboard_counters_refresh():
+    global dashboard_rebuild_task
+    if dashboard_rebuild_task is None or dashboard_rebuild_task.done():
+        dashboard_rebuild_task = asyncio.create_task(refresh_dashboard_counters_in_background())
+
+def publish_stock(article: dict):
+    event_broker.publish("stock", {
+        "id": article["id"],
+        "nom": article["nom"],
+        "quantite": article["quantite"],
+        "quantite_min": article["quantite_min"],
+    })
+
+def alert_operations(article: dict, now: datetime) -> list:
+    """Upserts/deletes that bring the alerts of ``article`` in line with its current state.
+
+    Alerts keep the ``created_at`` of when the condition first appeared.
+    """
+    expected = {}
+    if is_low_stock(article):
+        expected["stock_low"] = f"Stock faible: {article['quantite']} restants (min: {article['quantite_min']})"
+    if is_expiring_soon(article, now):
+        expected["expiring_soon"] = f"Expire dans {(article['date_expiration'] - now).days} jours"
+    
+    operations = []
+    for alert_type in ("stock_low", "expiring_soon"):
+        alert_id = f"{alert_type}:{article['id']}"
+        if alert_type in expected:
+            operations.append(UpdateOne(
+                {"_id": alert_id},
+                {"$set": {"nom": article["nom"], "message": expected[alert_type], "updated_at": now},
+                 "$setOnInsert": {"id": article["id"], "type": alert_type, "created_at": now}},
+                upsert=True
+            ))
+        else:
+            operations.append(DeleteOne({"_id": alert_id}))
+    return operations
+
+async def write_alerts(operations: list):
+    """Apply alert operations and announce the alerts that did not exist before."""
+    if not operations:
+        return
+    result = await db.alerts.bulk_write(operations, ordered=False)
+    for alert_id in result.upserted_ids.values():
+        alert_type, article_id = alert_id.split(":", 1)
+        event_broker.publish("alert", {"id": article_id, "type": alert_type})
+
+async def sync_article_alerts(article: dict):
+    await write_alerts(alert_operations(article, datetime.utcnow()))
+
+async def sweep_expiring_alerts():
+    """Refresh expiry alerts as the 30-day window moves: add new ones, drop stale ones."""
+    now = datetime.utcnow()
+    expiring = await db.articles.find(
+        {"date_expiration": {"$lte": now + EXPIRATION_WINDOW, "$gte": now}}
+    ).to_list(None)
+    await write_alerts([op for article in expiring for op in alert_operations(article, now)])
+    await db.alerts.delete_many({
+        "type": "expiring_soon",
+        "id": {"$nin": [article["id"] for article in expiring]}
+    })
+
+async def rebuild_alerts():
+    """Backfill low-stock alerts for existing data; only needs the ``$expr`` scan once."""
+    now = datetime.utcnow()
+    low_stock = await db.articles.find({"$expr": {"$lte": ["$quantite", "$quantite_min"]}}).to_list(None)
+    await write_alerts([op for article in low_stock for op in alert_operations(article, now)])
+    await db.alerts.delete_many({
+        "type": "stock_low",
+        "id": {"$nin": [article["id"] for article in low_stock]}
+    })
+    await sweep_expiring_alerts()
+
+async def alerts_sweeper():
+    while True:
+        await asyncio.sleep(ALERTS_SWEEP_INTERVAL)
+        try:
+            await sweep_expiring_alerts()
+        except Exception:
+            logger.exception("Expiry alert sweep failed")
+
+async def apply_stock_change(article_id: str, delta: int, require_stock: bool = False, session=None) -> Optional[dict]:
+    """Atomically add ``delta`` to an article's stock and return the updated article.
+
+    With ``require_stock`` the update only matches if enough stock is left, so
+    concurrent decrements can never drive it negative. Callers must pass the
+    result to ``stock_changed`` once the change is committed.
+    """
+    query = {"id": article_id}
+    if require_stock:
+        query["quantite"] = {"$gte": -delta}
+    return await db.articles.find_one_and_update(
+        query,
+        {"$inc": {"quantite": delta}, "$set": {"updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+
+async def stock_changed(article: dict, delta: int):
+    """Keep caches, counters, alerts and live subscribers in sync with a stock change."""
+    await articles_version.bump()
+    before = {**article, "quantite": article["quantite"] - delta}
+    await update_dashboard_counters(article_counter_deltas(before, article))
+    await sync_article_alerts(article)
+    publish_stock(article)
+
+async def iter_upload_lines(upload: UploadFile):
+    """Yield the raw lines of an upload without reading it all into memory."""
+    pending = b""
+    while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+class LineBuffer:
+    """Iterator over queued lines that can be refilled after running dry, fed to one csv.reader."""
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+def ends_in_quoted_field(line: str, quoted: bool = False) -> bool:
+    """Whether a CSV line ends inside a quoted field, given whether it started in one.
+
+    Follows csv.reader: a quote only opens a field when it is the field's first
+    character, so ``24"`` in an unquoted field is a literal inch mark.
+    """
+    at_field_start = not quoted
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if quoted:
+            if char == '"':
+                if line.startswith('"', i + 1):
+                    i += 1
+                else:
+                    quoted = False
+        elif char == '"' and at_field_start:
+            quoted = True
+        at_field_start = not quoted and char == ","
+        i += 1
+    return quoted
+
+async def parse_records(lines, format: ImportFormat):
+    """Yield ``(line number, record, error)`` for each non-empty CSV record or NDJSON line.
+
+    CSV records are keyed by the header row; empty cells become None. Quoted
+    fields may span lines: a record is only handed to the reader once it no
+    longer ends inside a quoted field, and is numbered after its first line.
+    Lines that are not valid UTF-8 are reported and skipped with their record.
+    """
+    header = None
+    number = 0
+    buffer = LineBuffer()
+    reader = csv.reader(buffer)
+    record_lines = []
+    record_start = 0
+    quoted = False
+    async for raw_line in lines:
+        number += 1
+        try:
+            line = raw_line.decode("utf-8-sig").rstrip("\r")
+        except UnicodeDecodeError as e:
+            yield record_start if record_lines else number, None, f"Invalid UTF-8: {e}"
+            record_lines.clear()
+            quoted = False
+            continue
+        if format == ImportFormat.CSV:
+            if not record_lines:
+                if not line.strip():
+                    continue
+                record_start = number
+            record_lines.append(line + "\n")
+            quoted = ends_in_quoted_field(line, quoted)
+            if quoted:
+                continue
+            buffer.lines.extend(record_lines)
+            record_lines.clear()
+            try:
+                values = next(reader)
+            except csv.Error as e:
+                yield record_start, None, f"Invalid CSV: {e}"
+                continue
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            yield record_start, {key: value if value != "" else None for key, value in zip(header, values)}, None
+        elif line.strip():
+            try:
+                yield number, json.loads(line), None
+            except ValueError as e:
+                yield number, None, f"Invalid JSON: {e}"
+    if record_lines:
+        yield record_start, None, "Unterminated quoted field"
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in error.errors())
+
+async def import_articles_batch(batch: list, report: dict):
+    articles = []
+    for _, data in batch:
+        article = Article(**data.dict())
+        article.code_qr = qr_code_url(article.id)
+        articles.append(article.dict())
+        search_index.add(articles[-1])
+    await db.articles.insert_many(articles, ordered=False)
+    await articles_version.bump()
+    
+    deltas = {}
+    for article in articles:
+        for key, value in article_counter_deltas(None, article).items():
+            deltas[key] = deltas.get(key, 0) + value
+    await update_dashboard_counters(deltas)
+    now = datetime.utcnow()
+    await write_alerts([op for article in articles for op in alert_operations(article, now)])
+    report["imported"] += len(articles)
+
+async def import_mouvements_batch(batch: list, report: dict, current_user: User):
+    article_ids = list({data.article_id for _, data in batch})
+    articles = await db.articles.find({"id": {"$in": article_ids}}).to_list(None)
+    articles = {article["id"]: article for article in articles}
+    
+    mouvements = []
+    deltas = {}
+    for number, data in batch:
+        if data.article_id not in articles:
+            add_import_error(report, number, "Article not found")
+            continue
+        mouvements.append(Mouvement(**data.dict(), utilisateur_id=current_user.id).dict())
+        delta = data.quantite if data.type == MouvementType.ENTREE else -data.quantite
+        deltas[data.article_id] = deltas.get(data.article_id, 0) + delta
+    if not mouvements:
+        return
+    
+    # One insert for the batch and one aggregated $inc per article
+    now = datetime.utcnow()
+    await db.mouvements.insert_many(mouvements, ordered=False)
+    await db.articles.bulk_write([
+        UpdateOne({"id": article_id}, {"$inc": {"quantite": delta}, "$set": {"updated_at": now}})
+        for article_id, delta in deltas.items()
+    ], ordered=False)
+    
+    # Same effects as stock_changed, with one counters update and one alerts write for the batch
+    updated = await db.articles.find({"id": {"$in": list(deltas)}}).to_list(None)
+    await articles_version.bump()
+    counter_deltas = {}
+    for article in updated:
+        before = {**article, "quantite": article["quantite"] - deltas[article["id"]]}
+        for key, value in article_counter_deltas(before, article).items():
+            counter_deltas[key] = counter_deltas.get(key, 0) + value
+    await update_dashboard_counters(counter_deltas)
+    await write_alerts([op for article in updated for op in alert_operations(article, now)])
+    for article in updated:
+        publish_stock(article)
+    report["imported"] += len(mouvements)
+
+def add_import_error(report: dict, line: int, error: str):
+    report["failed"] += 1
+    if len(report["errors"]) < MAX_IMPORT_ERRORS:
+        report["errors"].append({"line": line, "error": error})
+
+async def import_records(kind: ImportKind, records, current_user: User) -> dict:
+    """Validate records with the create models and write them in batches."""
+    model = ArticleCreate if kind == ImportKind.ARTICLES else MouvementCreate
+    report = {"imported": 0, "failed": 0, "errors": []}
+    batch = []
+    
+    async def flush():
+        if kind == ImportKind.ARTICLES:
+            await import_articles_batch(batch, report)
+        else:
+            await import_mouvements_batch(batch, report, current_user)
+        batch.clear()
+    
+    async for number, record, error in records:
+        if error is None:
+            try:
+                batch.append((number, model(**record)))
+            except ValidationError as e:
+                error = validation_message(e)
+            except TypeError:
+                error = "Record must be an object"
+        if error:
+            add_import_error(report, number, error)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    
+    await log_action(current_user.id, "IMPORT", kind.value.capitalize(), "bulk",
+                     f"Importé {report['imported']} {kind.value} ({report['failed']} erreurs)")
+    return report
+
+def write_archive_file(entries: List[dict]) -> Path:
+    # Files are named after their newest entry so that name order is time order
+    frame = pd.DataFrame(entries, columns=list(HistoriqueAction.__fields__))
+    newest, oldest = frame["created_at"].max(), frame["created_at"].min()
+    path = historique_archive_dir / f"historique_{newest:%Y%m%dT%H%M%S%f}_{oldest:%Y%m%dT%H%M%S%f}.parquet"
+    frame.to_parquet(path, compression="zstd", index=False)
+    return path
+
+async def archive_historique(max_age: timedelta = HISTORIQUE_ARCHIVE_AFTER) -> Optional[int]:
+    """Move entries older than ``max_age`` from the hot collection to Parquet files.
+
+    Returns None without archiving anything while another worker holds the lease.
+    """
+    if not await historique_archive_lease.acquire():
+        return None
+    cutoff = datetime.utcnow() - max_age
+    archived = 0
+    try:
+        while True:
+            entries = await db.historique_actions.find(
+                {"created_at": {"$lt": cutoff}}, {"_id": 0}
+            ).sort([("created_at", 1), ("id", 1)]).limit(HISTORIQUE_ARCHIVE_CHUNK).to_list(HISTORIQUE_ARCHIVE_CHUNK)
+            if not entries:
+                return archived
+            path = await asyncio.to_thread(write_archive_file, entries)
+            # Only delete once the file is safely written; the created_at bound lets it use the (created_at, id) index
+            await db.historique_actions.delete_many({
+                "created_at": {"$gte": entries[0]["created_at"], "$lte": entries[-1]["created_at"]},
+                "id": {"$in": [entry["id"] for entry in entries]}
+            })
+            archived += len(entries)
+            logger.info(f"Archived {len(entries)} historique entries to {path.name}")
+            if not await historique_archive_lease.acquire():
+                logger.warning("Historique archive lease lost, stopping")
+                return archived
+    finally:
+        await historique_archive_lease.release()
+
+def read_archive(filters: List[tuple], before: Optional[Tuple[datetime, str]], limit: int) -> List[dict]:
+    """Newest-first page of archived entries matching ``filters`` (pyarrow filter tuples)."""
+    rows = []
+    for path in sorted(historique_archive_dir.glob("historique_*.parquet"), reverse=True):
+        frame = pd.read_parquet(path, filters=filters or None)
+        if before:
+            created_at, last_id = before
+            frame = frame[(frame["created_at"] < created_at) | ((frame["created_at"] == created_at) & (frame["id"] < last_id))]
+        frame = frame.sort_values(["created_at", "id"], ascending=False).head(limit - len(rows))
+        for row in frame.to_dict("records"):
+            row["created_at"] = row["created_at"].to_pydatetime()
+            rows.append(row)
+        if len(rows) >= limit:
+            break
+    return rows
+
+async def historique_archiver():
+    while True:
+        try:
+            await archive_historique()
+        except Exception:
+            logger.exception("Historique archival failed")
+        await asyncio.sleep(HISTORIQUE_ARCHIVE_INTERVAL)
 
 async def log_action(user_id: str, action: str, cible_type: str, cible_id: str, description: str):
     historique = HistoriqueAction(
@@ -236,7 +2218,8 @@ async def log_action(user_id: str, action: str, cible_type: str, cible_id: str,
         cible_id=cible_id,
         description=description
     )
-    await db.historique_actions.insert_one(historique.dict())
+    with trace_span("log_action", **{"stockify.action": action, "stockify.cible_type": cible_type}):
+        await audit_log.put(historique.dict())
 
 # Authentication routes
 @api_router.post("/auth/register", response_model=UserResponse)
@@ -250,17 +2233,18 @@ async def register(user_data: UserCreate):
     user = User(
         nom=user_data.nom,
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=await hash_password_async(user_data.password),
         role=user_data.role
     )
     
     await db.users.insert_one(user.dict())
+    await update_dashboard_counters({"total_users": 1})
     return UserResponse(**user.dict())
 
 @api_router.post("/auth/login")
 async def login(user_data: UserLogin):
     user = await db.users.find_one({"email": user_data.email})
-    if not user or not verify_password(user_data.password, user["password_hash"]):
+    if not user or not await verify_password_async(user_data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -280,12 +2264,37 @@ async def get_me(current_user: User = Depends(get_current_user)):
 
 # Articles routes
 @api_router.get("/articles", response_model=List[ArticleResponse])
-async def get_articles(current_user: User = Depends(get_current_user)):
-    articles = await db.articles.find().to_list(1000)
-    return [ArticleResponse(**article) for article in articles]
+async def get_articles(
+    request: Request,
+    after: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=ARTICLES_PAGE_SIZE),
+    stream: bool = Query(False),
+    fields: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user)
+):
+    fields = parse_fields(fields, ArticleResponse)
+    query = parse_keyset_cursor(after) if after else {}
+    cursor = db.articles.find(query, projection(fields, "created_at")).sort([("created_at", 1), ("id", 1)])
+    
+    # Stream the whole catalogue (from the cursor) as NDJSON without buffering it
+    if stream:
+        if limit:
+            cursor = cursor.limit(limit)
+        return StreamingResponse(stream_articles(cursor, fields), media_type="application/x-ndjson")
+    
+    async def build():
+        page_size = limit or ARTICLES_PAGE_SIZE
+        articles = await cursor.limit(page_size).to_list(page_size)
+        headers = {}
+        if len(articles) == page_size:
+            headers["X-Next-Cursor"] = keyset_cursor(articles[-1])
+        return project_rows(articles, fields), headers
+    
+    return await cached_json_response(request, articles_cache, articles_version, build)
 
 @api_router.post("/articles", response_model=ArticleResponse)
 async def create_article(
+    background_tasks: BackgroundTasks,
     nom: str = Form(...),
     description: str = Form(...),
     quantite: int = Form(...),
@@ -298,46 +2307,117 @@ async def create_article(
     
     # Handle image upload
     image_path = None
+    thumbnail_path = None
     if image:
-        image_path = f"uploads/{article_id}_{image.filename}"
-        with open(uploads_dir / f"{article_id}_{image.filename}", "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        image_path, thumbnail_path = await save_upload(image, background_tasks)
     
     # Parse date_expiration
     expiration_date = None
     if date_expiration:
         expiration_date = datetime.fromisoformat(date_expiration)
     
-    # Generate QR code
-    qr_data = f"ARTICLE:{article_id}:{nom}"
-    qr_code = generate_qr_code(qr_data)
-    
     article = Article(
         id=article_id,
         nom=nom,
         description=description,
         image=image_path,
-        code_qr=qr_code,
+        thumbnail=thumbnail_path,
+        code_qr=qr_code_url(article_id),
         quantite=quantite,
         quantite_min=quantite_min,
         date_expiration=expiration_date
     )
     
     await db.articles.insert_one(article.dict())
+    await articles_version.bump()
+    await update_dashboard_counters(article_counter_deltas(None, article.dict()))
+    search_index.add(article.dict())
+    await sync_article_alerts(article.dict())
     await log_action(current_user.id, "CREATE", "Article", article_id, f"Créé l'article {nom}")
     
     return ArticleResponse(**article.dict())
 
+@api_router.post("/articles/labels")
+async def create_label_sheet(sheet: LabelSheetRequest, current_user: User = Depends(get_admin_user)):
+    if not sheet.article_ids:
+        raise HTTPException(status_code=400, detail="No articles selected")
+    if len(sheet.article_ids) > MAX_LABELS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LABELS} labels per sheet")
+    if sheet.format == LabelFormat.PNG and len(sheet.article_ids) > LABELS_PER_PAGE:
+        raise HTTPException(status_code=400, detail=f"PNG sheets hold at most {LABELS_PER_PAGE} labels, use PDF for more")
+    
+    start = time.perf_counter()
+    articles = await db.articles.find(
+        {"id": {"$in": sheet.article_ids}}, {"_id": 0, "id": 1, "nom": 1}
+    ).to_list(len(sheet.article_ids))
+    articles_by_id = {article["id"]: article for article in articles}
+    missing = [article_id for article_id in sheet.article_ids if article_id not in articles_by_id]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Articles not found: {', '.join(missing)}")
+    
+    # One page per worker task so pages are rendered in parallel across cores
+    labels = [(qr_code_data(articles_by_id[article_id]), articles_by_id[article_id]["nom"]) for article_id in sheet.article_ids]
+    pages = await asyncio.gather(*[
+        run_in_qr_pool(render_label_page, labels[i:i + LABELS_PER_PAGE])
+        for i in range(0, len(labels), LABELS_PER_PAGE)
+    ])
+    if sheet.format == LabelFormat.PDF:
+        content = await run_in_qr_pool(assemble_label_sheet, pages)
+    else:
+        content = pages[0]
+    
+    elapsed = time.perf_counter() - start
+    labels_per_second = len(labels) / elapsed
+    logger.info(f"Rendered {len(labels)} labels in {elapsed:.2f}s ({labels_per_second:.1f} labels/s)")
+    
+    media_type = "application/pdf" if sheet.format == LabelFormat.PDF else "image/png"
+    return Response(content=content, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="labels.{sheet.format.value}"',
+        "X-Labels-Per-Second": f"{labels_per_second:.1f}",
+    })
+
+@api_router.get("/articles/search", response_model=List[ArticleResponse])
+async def search_articles(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    article_ids = search_index.search(q, limit)
+    if not article_ids:
+        return []
+    articles = await db.articles.find({"id": {"$in": article_ids}}).to_list(len(article_ids))
+    articles = {article["id"]: article for article in articles}
+    return [ArticleResponse(**articles[article_id]) for article_id in article_ids if article_id in articles]
+
 @api_router.get("/articles/{article_id}", response_model=ArticleResponse)
-async def get_article(article_id: str, current_user: User = Depends(get_current_user)):
-    article = await db.articles.find_one({"id": article_id})
+async def get_article(article_id: str, request: Request, current_user: User = Depends(get_current_user)):
+    async def build():
+        article = await db.articles.find_one({"id": article_id})
+        if not article:
+            raise HTTPException(status_code=404, detail="Article not found")
+        return ArticleResponse(**article), {}
+    
+    return await cached_json_response(request, articles_cache, articles_version, build)
+
+@api_router.get("/articles/{article_id}/qr.png")
+async def get_article_qr(article_id: str, request: Request):
+    # Public like /uploads so the code can be used directly as an <img> source
+    article = await db.articles.find_one({"id": article_id}, {"_id": 0, "id": 1, "nom": 1})
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
-    return ArticleResponse(**article)
+    
+    data = qr_code_data(article)
+    # The code embeds the article name, so clients must revalidate against the ETag
+    headers = {"ETag": qr_etag(data), "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=await get_qr_png(data), media_type="image/png", headers=headers)
 
 @api_router.put("/articles/{article_id}", response_model=ArticleResponse)
 async def update_article(
     article_id: str,
+    background_tasks: BackgroundTasks,
     nom: str = Form(...),
     description: str = Form(...),
     quantite: int = Form(...),
@@ -352,10 +2432,9 @@ async def update_article(
     
     # Handle image upload
     image_path = article.get("image")
+    thumbnail_path = article.get("thumbnail")
     if image:
-        image_path = f"uploads/{article_id}_{image.filename}"
-        with open(uploads_dir / f"{article_id}_{image.filename}", "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        image_path, thumbnail_path = await save_upload(image, background_tasks)
     
     # Parse date_expiration
     expiration_date = None
@@ -369,16 +2448,22 @@ async def update_article(
             "nom": nom,
             "description": description,
             "image": image_path,
+            "thumbnail": thumbnail_path,
             "quantite": quantite,
             "quantite_min": quantite_min,
             "date_expiration": expiration_date,
             "updated_at": datetime.utcnow()
         }}
     )
+    await articles_version.bump()
     
     await log_action(current_user.id, "UPDATE", "Article", article_id, f"Modifié l'article {nom}")
     
     updated_article = await db.articles.find_one({"id": article_id})
+    await update_dashboard_counters(article_counter_deltas(article, updated_article))
+    search_index.add(updated_article)
+    await sync_article_alerts(updated_article)
+    publish_stock(updated_article)
     return ArticleResponse(**updated_article)
 
 @api_router.delete("/articles/{article_id}")
@@ -388,27 +2473,32 @@ async def delete_article(article_id: str, current_user: User = Depends(get_admin
         raise HTTPException(status_code=404, detail="Article not found")
     
     await db.articles.delete_one({"id": article_id})
+    await articles_version.bump()
+    await update_dashboard_counters(article_counter_deltas(article, None))
+    search_index.remove(article_id)
+    await db.alerts.delete_many({"id": article_id})
     await log_action(current_user.id, "DELETE", "Article", article_id, f"Supprimé l'article {article['nom']}")
     
     return {"message": "Article deleted successfully"}
 
 # Demandes routes
 @api_router.get("/demandes", response_model=List[DemandeResponse])
-async def get_demandes(current_user: User = Depends(get_current_user)):
+async def get_demandes(fields: Optional[str] = Query(None), current_user: User = Depends(get_current_user)):
+    fields = parse_fields(fields, DemandeResponse)
     query = {}
     if current_user.role == UserRole.USER:
         query = {"user_id": current_user.id}
     
-    demandes = await db.demandes.find(query).to_list(1000)
+    demandes = await db.demandes.find(query, projection(fields, "user_id", "article_id")).to_list(1000)
     
-    # Enrich with user and article names
-    for demande in demandes:
-        user = await db.users.find_one({"id": demande["user_id"]})
-        article = await db.articles.find_one({"id": demande["article_id"]})
-        demande["user_nom"] = user["nom"] if user else None
-        demande["article_nom"] = article["nom"] if article else None
+    # Enrich with user and article names, only when asked for
+    await enrich_names(
+        demandes,
+        user_field="user_id" if "user_nom" in fields else None,
+        article_field="article_id" if "article_nom" in fields else None
+    )
     
-    return [DemandeResponse(**demande) for demande in demandes]
+    return ORJSONResponse(project_rows(demandes, fields))
 
 @api_router.post("/demandes", response_model=DemandeResponse)
 async def create_demande(demande_data: DemandeCreate, current_user: User = Depends(get_current_user)):
@@ -423,35 +2513,47 @@ async def create_demande(demande_data: DemandeCreate, current_user: User = Depen
     )
     
     await db.demandes.insert_one(demande.dict())
+    await update_dashboard_counters({"total_demandes": 1})
+    event_broker.publish("demande", {
+        "id": demande.id,
+        "user_id": demande.user_id,
+        "article_id": demande.article_id,
+        "quantite_demandee": demande.quantite_demandee,
+    })
     await log_action(current_user.id, "CREATE", "Demande", demande.id, f"Demande de {demande_data.quantite_demandee} {article['nom']}")
     
     return DemandeResponse(**demande.dict(), user_nom=current_user.nom, article_nom=article["nom"])
 
-@api_router.put("/demandes/{demande_id}/approve")
-async def approve_demande(demande_id: str, current_user: User = Depends(get_admin_user)):
-    demande = await db.demandes.find_one({"id": demande_id})
+async def approve_demande_writes(demande_id: str, current_user: User, session=None):
+    """Claim a pending demande, decrement stock conditionally and record the mouvement.
+
+    A failed stock check hands the demande back to pending, so the caller can
+    carry on without a transaction.
+    """
+    demande = await db.demandes.find_one_and_update(
+        {"id": demande_id, "statut": DemandeStatus.PENDING},
+        {"$set": {"statut": DemandeStatus.APPROVED, "updated_at": datetime.utcnow()}},
+        session=session
+    )
     if not demande:
+        if await db.demandes.count_documents({"id": demande_id}, limit=1, session=session):
+            raise HTTPException(status_code=400, detail="Demande already processed")
         raise HTTPException(status_code=404, detail="Demande not found")
     
-    article = await db.articles.find_one({"id": demande["article_id"]})
+    # Update article stock, only if enough is left
+    article = await apply_stock_change(
+        demande["article_id"], -demande["quantite_demandee"], require_stock=True, session=session
+    )
     if not article:
+        await db.demandes.update_one(
+            {"id": demande_id},
+            {"$set": {"statut": DemandeStatus.PENDING, "updated_at": datetime.utcnow()}},
+            session=session
+        )
+        if await db.articles.count_documents({"id": demande["article_id"]}, limit=1, session=session):
+            raise HTTPException(status_code=400, detail="Stock insuffisant")
         raise HTTPException(status_code=404, detail="Article not found")
     
-    if article["quantite"] < demande["quantite_demandee"]:
-        raise HTTPException(status_code=400, detail="Stock insuffisant")
-    
-    # Update demande status
-    await db.demandes.update_one(
-        {"id": demande_id},
-        {"$set": {"statut": DemandeStatus.APPROVED, "updated_at": datetime.utcnow()}}
-    )
-    
-    # Update article stock
-    await db.articles.update_one(
-        {"id": demande["article_id"]},
-        {"$inc": {"quantite": -demande["quantite_demandee"]}, "$set": {"updated_at": datetime.utcnow()}}
-    )
-    
     # Log movement
     mouvement = Mouvement(
         article_id=demande["article_id"],
@@ -460,12 +2562,180 @@ async def approve_demande(demande_id: str, current_user: User = Depends(get_admi
         utilisateur_id=current_user.id,
         raison=f"Demande approuvée #{demande_id}"
     )
-    await db.mouvements.insert_one(mouvement.dict())
+    await db.mouvements.insert_one(mouvement.dict(), session=session)
     
+    return demande, article
+
+async def run_in_transaction(callback):
+    """Run ``callback(session)`` in a transaction.
+
+    ``with_transaction`` retries the whole callback on TransientTransactionError
+    (e.g. a write conflict with a concurrent approval) and the commit on
+    UnknownTransactionCommitResult; any other exception aborts and propagates.
+    """
+    async with await client.start_session() as session:
+        return await session.with_transaction(callback)
+
+@api_router.put("/demandes/{demande_id}/approve")
+async def approve_demande(demande_id: str, current_user: User = Depends(get_admin_user)):
+    if MONGO_TRANSACTIONS:
+        demande, article = await run_in_transaction(
+            lambda session: approve_demande_writes(demande_id, current_user, session)
+        )
+    else:
+        demande, article = await approve_demande_writes(demande_id, current_user)
+    
+    await stock_changed(article, -demande["quantite_demandee"])
     await log_action(current_user.id, "APPROVE", "Demande", demande_id, f"Approuvé la demande #{demande_id}")
     
     return {"message": "Demande approved successfully"}
 
+async def process_demandes_writes(accepted: list, demandes: dict, current_user: User, session=None) -> Tuple[dict, list]:
+    """Apply the accepted decisions in bulk and return ``(failures, stock_changes)``.
+
+    Demandes are claimed first with a ``statut: pending`` filter, so one processed
+    concurrently is never applied twice, then stock is taken per article for the
+    claimed approvals only. Approvals of an article whose stock changed since
+    validation are handed back to pending and retried one by one. ``failures``
+    maps demande ids to an error detail; ``stock_changes`` lists the
+    ``(updated article, delta)`` pairs to pass to ``stock_changed``.
+    """
+    now = datetime.utcnow()
+    claim = str(uuid.uuid4())
+    statuses = {BulkDecision.APPROVE: DemandeStatus.APPROVED, BulkDecision.REJECT: DemandeStatus.REJECTED}
+    for decision, statut in statuses.items():
+        ids = [item.id for item in accepted if item.decision == decision]
+        if ids:
+            await db.demandes.update_many(
+                {"id": {"$in": ids}, "statut": DemandeStatus.PENDING},
+                {"$set": {"statut": statut, "updated_at": now, "bulk_claim": claim}},
+                session=session
+            )
+    # The id filter lets both lookups use the unique id index instead of scanning for the token
+    claimed_filter = {"id": {"$in": [item.id for item in accepted]}, "bulk_claim": claim}
+    claimed = {
+        demande["id"]
+        async for demande in db.demandes.find(claimed_filter, {"_id": 0, "id": 1}, session=session)
+    }
+    if claimed:
+        await db.demandes.update_many(claimed_filter, {"$unset": {"bulk_claim": ""}}, session=session)
+    failures = {item.id: "Demande already processed" for item in accepted if item.id not in claimed}
+    
+    approvals = {}
+    for item in accepted:
+        if item.decision == BulkDecision.APPROVE and item.id in claimed:
+            approvals.setdefault(demandes[item.id]["article_id"], []).append(item.id)
+    changes = [
+        apply_stock_change(article_id, -sum(demandes[i]["quantite_demandee"] for i in ids), require_stock=True, session=session)
+        for article_id, ids in approvals.items()
+    ]
+    # A session cannot be used by concurrent operations
+    updated = await asyncio.gather(*changes) if session is None else [await change for change in changes]
+    
+    stock_changes = []
+    mouvements = []
+    retry = []
+    for (article_id, ids), article in zip(approvals.items(), updated):
+        if article is None:
+            retry.extend(ids)
+            continue
+        stock_changes.append((article, -sum(demandes[i]["quantite_demandee"] for i in ids)))
+        mouvements.extend(
+            Mouvement(
+                article_id=article_id,
+                type=MouvementType.SORTIE,
+                quantite=demandes[i]["quantite_demandee"],
+                utilisateur_id=current_user.id,
+                raison=f"Demande approuvée #{i}"
+            ).dict()
+            for i in ids
+        )
+    if mouvements:
+        await db.mouvements.insert_many(mouvements, session=session)
+    
+    if retry:
+        await db.demandes.update_many(
+            {"id": {"$in": retry}},
+            {"$set": {"statut": DemandeStatus.PENDING, "updated_at": now}},
+            session=session
+        )
+        for demande_id in retry:
+            try:
+                demande, article = await approve_demande_writes(demande_id, current_user, session)
+                stock_changes.append((article, -demande["quantite_demandee"]))
+            except HTTPException as e:
+                failures[demande_id] = e.detail
+    
+    return failures, stock_changes
+
+@api_router.post("/demandes/bulk", response_model=List[BulkDemandeResult])
+async def process_demandes(bulk: BulkDemandeRequest, current_user: User = Depends(get_admin_user)):
+    if len(bulk.items) > MAX_BULK_DEMANDES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_DEMANDES} demandes per request")
+    
+    demandes = await db.demandes.find({"id": {"$in": [item.id for item in bulk.items]}}).to_list(None)
+    demandes = {demande["id"]: demande for demande in demandes}
+    articles = await db.articles.find(
+        {"id": {"$in": list({demande["article_id"] for demande in demandes.values()})}}
+    ).to_list(None)
+    articles = {article["id"]: article for article in articles}
+    
+    # Validate every item, allocating stock in request order
+    results = []
+    accepted = []
+    stock_used = {}
+    seen = set()
+    for item in bulk.items:
+        demande = demandes.get(item.id)
+        detail = None
+        if item.id in seen:
+            detail = "Duplicate demande"
+        elif not demande:
+            detail = "Demande not found"
+        elif demande["statut"] != DemandeStatus.PENDING:
+            detail = "Demande already processed"
+        elif item.decision == BulkDecision.APPROVE:
+            article = articles.get(demande["article_id"])
+            used = stock_used.get(demande["article_id"], 0)
+            if not article:
+                detail = "Article not found"
+            elif article["quantite"] - used < demande["quantite_demandee"]:
+                detail = "Stock insuffisant"
+            else:
+                stock_used[demande["article_id"]] = used + demande["quantite_demandee"]
+        seen.add(item.id)
+        results.append(BulkDemandeResult(id=item.id, decision=item.decision, success=detail is None, detail=detail))
+        if detail is None:
+            accepted.append(item)
+    
+    if not accepted:
+        return results
+    
+    if MONGO_TRANSACTIONS:
+        failures, stock_changes = await run_in_transaction(
+            lambda session: process_demandes_writes(accepted, demandes, current_user, session)
+        )
+    else:
+        failures, stock_changes = await process_demandes_writes(accepted, demandes, current_user)
+    
+    for article, delta in stock_changes:
+        await stock_changed(article, delta)
+    
+    for result in results:
+        if result.success and result.id in failures:
+            result.success = False
+            result.detail = failures[result.id]
+    
+    for item in accepted:
+        if item.id in failures:
+            continue
+        if item.decision == BulkDecision.APPROVE:
+            await log_action(current_user.id, "APPROVE", "Demande", item.id, f"Approuvé la demande #{item.id}")
+        else:
+            await log_action(current_user.id, "REJECT", "Demande", item.id, f"Rejeté la demande #{item.id}")
+    
+    return results
+
 @api_router.put("/demandes/{demande_id}/reject")
 async def reject_demande(demande_id: str, current_user: User = Depends(get_admin_user)):
     demande = await db.demandes.find_one({"id": demande_id})
@@ -484,14 +2754,10 @@ async def reject_demande(demande_id: str, current_user: User = Depends(get_admin
 # Mouvements routes
 @api_router.get("/mouvements")
 async def get_mouvements(current_user: User = Depends(get_admin_user)):
-    mouvements = await db.mouvements.find().sort("created_at", -1).to_list(1000)
+    mouvements = await db.mouvements.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
     
     # Enrich with article and user names
-    for mouvement in mouvements:
-        article = await db.articles.find_one({"id": mouvement["article_id"]})
-        user = await db.users.find_one({"id": mouvement["utilisateur_id"]})
-        mouvement["article_nom"] = article["nom"] if article else None
-        mouvement["user_nom"] = user["nom"] if user else None
+    await enrich_names(mouvements, user_field="utilisateur_id", article_field="article_id")
     
     return mouvements
 
@@ -512,129 +2778,210 @@ async def create_mouvement(mouvement_data: MouvementCreate, current_user: User =
     await db.mouvements.insert_one(mouvement.dict())
     
     # Update article stock
-    if mouvement_data.type == MouvementType.ENTREE:
-        await db.articles.update_one(
-            {"id": mouvement_data.article_id},
-            {"$inc": {"quantite": mouvement_data.quantite}, "$set": {"updated_at": datetime.utcnow()}}
-        )
-    else:
-        await db.articles.update_one(
-            {"id": mouvement_data.article_id},
-            {"$inc": {"quantite": -mouvement_data.quantite}, "$set": {"updated_at": datetime.utcnow()}}
-        )
+    delta = mouvement_data.quantite if mouvement_data.type == MouvementType.ENTREE else -mouvement_data.quantite
+    updated_article = await apply_stock_change(mouvement_data.article_id, delta)
+    if updated_article:
+        await stock_changed(updated_article, delta)
     
     await log_action(current_user.id, "CREATE", "Mouvement", mouvement.id, f"Mouvement {mouvement_data.type} de {mouvement_data.quantite} {article['nom']}")
     
     return {"message": "Mouvement created successfully"}
 
+# Import routes
+@api_router.post("/import/{kind}")
+async def import_data(
+    kind: ImportKind,
+    file: UploadFile = File(...),
+    format: Optional[ImportFormat] = Query(None),
+    current_user: User = Depends(get_admin_user)
+):
+    if format is None:
+        suffix = Path(file.filename or "").suffix.lower().lstrip(".")
+        format = ImportFormat.NDJSON if suffix in ("ndjson", "jsonl") else ImportFormat.CSV
+    
+    return await import_records(kind, parse_records(iter_upload_lines(file), format), current_user)
+
 # Dashboard routes
 @api_router.get("/dashboard/stats", response_model=DashboardStats)
 async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
-    total_articles = await db.articles.count_documents({})
-    total_users = await db.users.count_documents({})
-    total_demandes = await db.demandes.count_documents({})
+    counters = await db.counters.find_one({"_id": DASHBOARD_COUNTERS_ID})
     
-    # Articles with low stock
-    articles_low_stock = await db.articles.count_documents({
-        "$expr": {"$lte": ["$quantite", "$quantite_min"]}
-    })
+    # Stale counters are served while a background task recounts; only a missing document waits
+    if counters is None:
+        counters = await refresh_dashboard_counters()
+    elif dashboard_counters_stale(counters):
+        schedule_dashboard_counters_refresh()
     
-    # Articles expiring soon (next 30 days)
-    thirty_days_from_now = datetime.utcnow() + timedelta(days=30)
-    articles_expiring_soon = await db.articles.count_documents({
-        "date_expiration": {"$lte": thirty_days_from_now, "$gte": datetime.utcnow()}
-    })
-    
-    return DashboardStats(
-        total_articles=total_articles,
-        total_users=total_users,
-        total_demandes=total_demandes,
-        articles_low_stock=articles_low_stock,
-        articles_expiring_soon=articles_expiring_soon
-    )
+    return DashboardStats(**counters)
 
 @api_router.get("/dashboard/alerts", response_model=List[AlerteItem])
-async def get_alerts(current_user: User = Depends(get_current_user)):
-    alerts = []
-    
-    # Low stock alerts
-    low_stock_articles = await db.articles.find({
-        "$expr": {"$lte": ["$quantite", "$quantite_min"]}
-    }).to_list(100)
-    
-    for article in low_stock_articles:
-        alerts.append(AlerteItem(
-            id=article["id"],
-            nom=article["nom"],
-            type="stock_low",
-            message=f"Stock faible: {article['quantite']} restants (min: {article['quantite_min']})",
-            created_at=datetime.utcnow()
-        ))
-    
-    # Expiring soon alerts
-    thirty_days_from_now = datetime.utcnow() + timedelta(days=30)
-    expiring_articles = await db.articles.find({
-        "date_expiration": {"$lte": thirty_days_from_now, "$gte": datetime.utcnow()}
-    }).to_list(100)
-    
-    for article in expiring_articles:
-        days_until_expiration = (article["date_expiration"] - datetime.utcnow()).days
-        alerts.append(AlerteItem(
-            id=article["id"],
-            nom=article["nom"],
-            type="expiring_soon",
-            message=f"Expire dans {days_until_expiration} jours",
-            created_at=datetime.utcnow()
-        ))
-    
-    return alerts
+async def get_alerts(
+    response: Response,
+    after: Optional[str] = Query(None),
+    limit: int = Query(ALERTS_PAGE_SIZE, ge=1, le=1000),
+    current_user: User = Depends(get_current_user)
+):
+    query = parse_keyset_cursor(after, key="_id", descending=True) if after else {}
+    alerts = await db.alerts.find(query).sort([("created_at", -1), ("_id", -1)]).limit(limit).to_list(limit)
+    if len(alerts) == limit:
+        response.headers["X-Next-Cursor"] = keyset_cursor(alerts[-1], key="_id")
+    return [AlerteItem(**alert) for alert in alerts]
 
 @api_router.get("/dashboard/charts")
 async def get_chart_data(current_user: User = Depends(get_current_user)):
     # Articles by category (simplified - we'll use first letter of name)
-    articles = await db.articles.find().to_list(1000)
-    category_counts = {}
-    for article in articles:
-        category = article["nom"][0].upper() if article["nom"] else "A"
-        category_counts[category] = category_counts.get(category, 0) + 1
+    categories = db.articles.aggregate([
+        {"$group": {
+            "_id": {"$toUpper": {"$substrCP": [{"$ifNull": ["$nom", ""]}, 0, 1]}},
+            "count": {"$sum": 1}
+        }}
+    ]).to_list(None)
     
     # Demandes by status
-    demandes = await db.demandes.find().to_list(1000)
-    status_counts = {"pending": 0, "approved": 0, "rejected": 0}
-    for demande in demandes:
-        status_counts[demande["statut"]] += 1
+    statuses = db.demandes.aggregate([
+        {"$group": {"_id": "$statut", "count": {"$sum": 1}}}
+    ]).to_list(None)
     
     # Stock levels
-    stock_levels = []
-    for article in articles:
-        stock_levels.append({
-            "nom": article["nom"],
-            "quantite": article["quantite"],
-            "quantite_min": article["quantite_min"]
-        })
+    stock_levels = db.articles.find(
+        {}, {"_id": 0, "nom": 1, "quantite": 1, "quantite_min": 1}
+    ).sort("created_at", 1).limit(10).to_list(10)
+    
+    categories, statuses, stock_levels = await asyncio.gather(categories, statuses, stock_levels)
+    
+    category_counts = {}
+    for category in categories:
+        # $toUpper only handles ASCII, so "é" and "É" arrive as separate groups
+        key = (category["_id"] or "A").upper()
+        category_counts[key] = category_counts.get(key, 0) + category["count"]
+    
+    status_counts = {"pending": 0, "approved": 0, "rejected": 0}
+    status_counts.update({status["_id"]: status["count"] for status in statuses})
     
     return {
         "articles_by_category": category_counts,
         "demandes_by_status": status_counts,
-        "stock_levels": stock_levels[:10]  # Limit to 10 items
+        "stock_levels": stock_levels
     }
 
+# Live events
+async def event_stream(request: Request, queue: asyncio.Queue):
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            if message is None:
+                break
+            yield message
+    finally:
+        event_broker.unsubscribe(queue)
+
+@api_router.get("/events")
+async def get_events(request: Request, token: str = Query(...)):
+    # EventSource cannot send an Authorization header, so the JWT comes in the query string
+    await authenticate_token(token)
+    return StreamingResponse(
+        event_stream(request, event_broker.subscribe()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Historique routes
 @api_router.get("/historique")
-async def get_historique(current_user: User = Depends(get_current_user)):
-    query = {}
+async def get_historique(
+    response: Response,
+    after: Optional[str] = Query(None),
+    limit: int = Query(HISTORIQUE_PAGE_SIZE, ge=1, le=1000),
+    user_id: Optional[str] = Query(None),
+    action: Optional[str] = Query(None),
+    cible_type: Optional[str] = Query(None),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    include_archive: bool = Query(False),
+    current_user: User = Depends(get_current_user)
+):
     if current_user.role == UserRole.USER:
-        query = {"user_id": current_user.id}
+        user_id = current_user.id
+    
+    filters = {"user_id": user_id, "action": action, "cible_type": cible_type}
+    query = {key: value for key, value in filters.items() if value is not None}
+    date_from, date_to = naive_utc(date_from), naive_utc(date_to)
+    if date_from or date_to:
+        query["created_at"] = {}
+        if date_from:
+            query["created_at"]["$gte"] = date_from
+        if date_to:
+            query["created_at"]["$lte"] = date_to
+    if after:
+        query.update(parse_keyset_cursor(after, key="id", descending=True))
+    
+    historique = await db.historique_actions.find(query, {"_id": 0}).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit).to_list(limit)
     
-    historique = await db.historique_actions.find(query).sort("created_at", -1).limit(100).to_list(100)
+    # Archived entries are all older than the hot ones, so the archive continues the page
+    if include_archive and len(historique) < limit:
+        archive_filters = [(key, "==", value) for key, value in filters.items() if value is not None]
+        if date_from:
+            archive_filters.append(("created_at", ">=", date_from))
+        if date_to:
+            archive_filters.append(("created_at", "<=", date_to))
+        last = historique[-1] if historique else None
+        before = (last["created_at"], last["id"]) if last else None
+        if before is None and after:
+            created_at, last_id = after.rsplit(",", 1)
+            before = (naive_utc(datetime.fromisoformat(created_at)), last_id)
+        historique += await asyncio.to_thread(read_archive, archive_filters, before, limit - len(historique))
+    
+    if len(historique) == limit:
+        response.headers["X-Next-Cursor"] = keyset_cursor(historique[-1])
     
     # Enrich with user names
-    for action in historique:
-        user = await db.users.find_one({"id": action["user_id"]})
-        action["user_nom"] = user["nom"] if user else None
+    await enrich_names(historique, user_field="user_id")
     
     return historique
 
+# Admin routes
+@api_router.get("/admin/indexes")
+async def get_index_report(current_user: User = Depends(get_admin_user)):
+    return await explain_query_shapes()
+
+@api_router.get("/admin/cache")
+async def get_cache_stats(current_user: User = Depends(get_admin_user)):
+    return {"users": user_cache.stats(), "qr": qr_cache.stats(), "articles": articles_cache.stats()}
+
+@api_router.get("/admin/events")
+async def get_event_stats(current_user: User = Depends(get_admin_user)):
+    return event_broker.stats()
+
+@api_router.post("/admin/historique/archive")
+async def run_historique_archive(current_user: User = Depends(get_admin_user)):
+    archived = await archive_historique()
+    if archived is None:
+        raise HTTPException(status_code=409, detail="Historique archival already running")
+    return {"archived": archived}
+
+@api_router.get("/admin/audit")
+async def get_audit_stats(current_user: User = Depends(get_admin_user)):
+    return audit_log.stats()
+
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(current_user: User = Depends(get_admin_user)):
+    return slow_query_log.report()
+
+@api_router.get("/admin/pools")
+async def get_pool_stats(current_user: User = Depends(get_admin_user)):
+    return {"bcrypt": {"size": BCRYPT_POOL_SIZE, **bcrypt_metrics.stats()}}
+
+@app.get("/metrics")
+async def get_metrics():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -644,8 +2991,13 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Labels-Per-Second", "X-Trace-Id"],
 )
 
+app.add_middleware(SlowQueryMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -653,6 +3005,72 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+alerts_sweep_task = None
+historique_archive_task = None
+loop_lag_task = None
+search_refresh_task = None
+version_refresh_task = None
+qr_prune_task = None
+
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_indexes()
+
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    global loop_lag_task
+    loop_lag_task = asyncio.create_task(monitor_event_loop_lag())
+
+@app.on_event("startup")
+async def build_search_index():
+    global search_refresh_task
+    since = datetime.utcnow()
+    await rebuild_search_index()
+    search_refresh_task = asyncio.create_task(search_index_refresher(since))
+
+@app.on_event("startup")
+async def start_version_refresher():
+    global version_refresh_task
+    await articles_version.refresh()
+    version_refresh_task = asyncio.create_task(collection_version_refresher())
+
+@app.on_event("startup")
+async def start_qr_cache_pruner():
+    global qr_prune_task
+    qr_prune_task = asyncio.create_task(qr_cache_pruner())
+
+@app.on_event("startup")
+async def start_audit_log():
+    audit_log.start()
+
+@app.on_event("startup")
+async def start_slow_query_log():
+    slow_query_log.loop = asyncio.get_running_loop()
+
+@app.on_event("startup")
+async def start_trace_exporter():
+    if TRACING_ENABLED:
+        trace_exporter.start()
+
+@app.on_event("startup")
+async def start_alerts_sweeper():
+    global alerts_sweep_task
+    await rebuild_alerts()
+    alerts_sweep_task = asyncio.create_task(alerts_sweeper())
+
+@app.on_event("startup")
+async def start_historique_archiver():
+    global historique_archive_task
+    historique_archive_task = asyncio.create_task(historique_archiver())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    for task in (alerts_sweep_task, historique_archive_task, loop_lag_task, search_refresh_task, version_refresh_task,
+                 dashboard_rebuild_task, qr_prune_task):
+        if task:
+            task.cancel()
+    await audit_log.stop()
+    trace_exporter.stop()
+    client.close()
+    bcrypt_executor.shutdown(wait=False)
+    qr_executor.shutdown(wait=False)
\ No newline at end of file
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Stockify concurrent approval stress test
+Approves many demandes for the same article concurrently and checks that stock
+never goes negative and that exactly as many demandes as the stock allows are
+approved. Run it against a local replica-set mongod to exercise transactions:
+
+    MONGO_URL="mongodb://localhost:27017/?replicaSet=rs0" python benchmarks/approval_stress_test.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+
+STOCK = int(os.environ.get("STOCK", 100))
+DEMANDES = int(os.environ.get("DEMANDES", 500))
+
+
+async def seed(db):
+    for collection in ("articles", "demandes", "mouvements", "historique_actions", "alerts", "counters"):
+        await db[collection].delete_many({})
+
+    now = datetime.utcnow()
+    article_id = str(uuid.uuid4())
+    await db.articles.insert_one({
+        "id": article_id, "nom": "Stress article", "description": "", "image": None, "code_qr": None,
+        "quantite": STOCK, "quantite_min": 0, "date_expiration": None, "created_at": now, "updated_at": now,
+    })
+    demande_ids = [str(uuid.uuid4()) for _ in range(DEMANDES)]
+    await db.demandes.insert_many([{
+        "id": demande_id, "user_id": "stress", "article_id": article_id, "quantite_demandee": 1,
+        "statut": "pending", "date_demande": now, "created_at": now, "updated_at": now,
+    } for demande_id in demande_ids])
+    return article_id, demande_ids
+
+
+async def approve(demande_id, admin):
+    try:
+        await server.approve_demande(demande_id, current_user=admin)
+        return "approved"
+    except HTTPException as e:
+        return e.detail
+    except Exception as e:
+        # Anything but a clean HTTP error (e.g. an unretried write conflict) is a failure
+        return f"error: {type(e).__name__}: {e}"
+
+
+async def run(db, admin, transactions):
+    server.MONGO_TRANSACTIONS = transactions
+    article_id, demande_ids = await seed(db)
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*[approve(demande_id, admin) for demande_id in demande_ids])
+    elapsed = time.perf_counter() - start
+
+    article = await db.articles.find_one({"id": article_id})
+    approved = await db.demandes.count_documents({"statut": "approved"})
+    mouvements = await db.mouvements.count_documents({"article_id": article_id})
+    expected = min(STOCK, DEMANDES)
+    errors = [outcome for outcome in outcomes if outcome.startswith("error: ")]
+    ok = (article["quantite"] == STOCK - expected and approved == expected and not errors
+          and mouvements == expected and outcomes.count("approved") == expected)
+
+    mode = "transaction" if transactions else "conditional"
+    print(f"{mode:<12} {elapsed:>7.2f}s {DEMANDES / elapsed:>9.0f} approvals/s  "
+          f"stock={article['quantite']} approved={approved} mouvements={mouvements} errors={len(errors)}  "
+          f"{'OK' if ok else 'FAILED'}")
+    if errors:
+        print(f"             first error: {errors[0]}")
+    return ok
+
+
+async def main():
+    db = server.client[os.environ.get("BENCH_DB_NAME", "stockify_stress")]
+    server.db = db
+    admin = server.User(nom="Stress Admin", email="admin@stress.local", password_hash="x", role=server.UserRole.ADMIN)
+
+    print(f"Stockify approval stress test: {DEMANDES} concurrent approvals, stock {STOCK}")
+    try:
+        results = [await run(db, admin, transactions=False)]
+        hello = await server.client.admin.command("hello")
+        if "setName" in hello:
+            results.append(await run(db, admin, transactions=True))
+        else:
+            print("transaction  skipped: mongod is not part of a replica set")
+    finally:
+        await server.client.drop_database(db.name)
+        server.client.close()
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Stockify enrichment benchmark
+Counts Mongo round trips issued by the listing endpoints as the result size grows.
+With batched name enrichment the count must stay constant.
+Runs the app in-process through httpx's ASGI transport against MONGO_URL.
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from pymongo import monitoring
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+SIZES = [10, 100, 1000]
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def seed(db, size, admin):
+    await db.users.delete_many({})
+    await db.articles.delete_many({})
+    await db.demandes.delete_many({})
+    await db.mouvements.delete_many({})
+    await db.historique_actions.delete_many({})
+
+    users = [{"id": str(uuid.uuid4()), "nom": f"User {i}", "email": f"user{i}@bench.local",
+              "password_hash": "x", "role": "user", "created_at": datetime.utcnow(),
+              "updated_at": datetime.utcnow()} for i in range(max(size // 10, 1))]
+    articles = [{"id": str(uuid.uuid4()), "nom": f"Article {i}", "description": "", "image": None,
+                 "code_qr": None, "quantite": 10, "quantite_min": 1, "date_expiration": None,
+                 "created_at": datetime.utcnow(), "updated_at": datetime.utcnow()}
+                for i in range(max(size // 5, 1))]
+    await db.users.insert_many(users + [admin.dict()])
+    await db.articles.insert_many(articles)
+
+    now = datetime.utcnow()
+    await db.demandes.insert_many([{
+        "id": str(uuid.uuid4()), "user_id": users[i % len(users)]["id"],
+        "article_id": articles[i % len(articles)]["id"], "quantite_demandee": 1,
+        "statut": "pending", "date_demande": now, "created_at": now, "updated_at": now,
+    } for i in range(size)])
+    await db.mouvements.insert_many([{
+        "id": str(uuid.uuid4()), "article_id": articles[i % len(articles)]["id"], "type": "entree",
+        "quantite": 1, "utilisateur_id": users[i % len(users)]["id"], "raison": "bench", "created_at": now,
+    } for i in range(size)])
+    await db.historique_actions.insert_many([{
+        "id": str(uuid.uuid4()), "user_id": users[i % len(users)]["id"], "action": "CREATE",
+        "cible_type": "Article", "cible_id": articles[i % len(articles)]["id"], "description": "bench",
+        "created_at": now,
+    } for i in range(size)])
+
+
+async def main():
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"], event_listeners=[counter])
+    db = client[os.environ.get("BENCH_DB_NAME", "stockify_bench")]
+    server.db = db
+
+    admin = server.User(nom="Bench Admin", email="admin@bench.local", password_hash="x", role=server.UserRole.ADMIN)
+    headers = {"Authorization": f"Bearer {server.create_access_token({'sub': admin.id})}"}
+    endpoints = {
+        "GET /demandes": "/api/demandes",
+        "GET /mouvements": "/api/mouvements",
+        "GET /historique": "/api/historique?limit=1000",
+    }
+
+    print(f"{'endpoint':<18}{'rows':>8}{'round trips':>14}")
+    transport = httpx.ASGITransport(app=server.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for size in SIZES:
+                await seed(db, size, admin)
+                # Resolve the admin once so the auth lookup is not counted against the endpoints
+                server.user_cache.clear()
+                (await http.get("/api/auth/me", headers=headers)).raise_for_status()
+                for name, path in endpoints.items():
+                    counter.count = 0
+                    response = await http.get(path, headers=headers)
+                    response.raise_for_status()
+                    print(f"{name:<18}{len(response.json()):>8}{counter.count:>14}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
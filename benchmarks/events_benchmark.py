@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Stockify event fan-out benchmark
+Measures how fast one worker fans events out to thousands of in-process SSE
+subscribers, and checks that slow subscribers are disconnected instead of
+growing memory.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+SUBSCRIBERS = [100, 1000, 5000, 10000]
+EVENTS = int(os.environ.get("EVENTS", 50))
+
+
+async def drain(queue, received):
+    while True:
+        message = await queue.get()
+        if message is None:
+            return
+        received[0] += 1
+
+
+async def bench(subscribers):
+    broker = server.EventBroker(server.EVENTS_QUEUE_SIZE)
+    queues = [broker.subscribe() for _ in range(subscribers)]
+    received = [0]
+    consumers = [asyncio.create_task(drain(queue, received)) for queue in queues]
+
+    start = time.perf_counter()
+    for i in range(EVENTS):
+        broker.publish("stock", {"id": str(i), "nom": "Article", "quantite": i, "quantite_min": 1})
+        await asyncio.sleep(0)
+    publish_time = time.perf_counter() - start
+    while received[0] < subscribers * EVENTS:
+        await asyncio.sleep(0)
+    delivered_time = time.perf_counter() - start
+
+    for consumer in consumers:
+        consumer.cancel()
+    return publish_time, delivered_time
+
+
+async def bench_slow_subscriber():
+    broker = server.EventBroker(server.EVENTS_QUEUE_SIZE)
+    broker.subscribe()
+    for i in range(server.EVENTS_QUEUE_SIZE + 1):
+        broker.publish("stock", {"id": str(i)})
+    return broker.stats()
+
+
+async def main():
+    print(f"Stockify event fan-out benchmark: {EVENTS} events per run")
+    print(f"{'subscribers':>12}{'publish ms/event':>18}{'deliveries/s':>16}")
+    for subscribers in SUBSCRIBERS:
+        publish_time, delivered_time = await bench(subscribers)
+        print(f"{subscribers:>12}{publish_time / EVENTS * 1000:>18.3f}{subscribers * EVENTS / delivered_time:>16.0f}")
+
+    stats = await bench_slow_subscriber()
+    print(f"\nSlow subscriber: {stats['disconnected']} disconnected, {stats['subscribers']} still subscribed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
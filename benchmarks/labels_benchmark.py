@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Stockify label rendering benchmark
+Measures QR label throughput (labels per second) rendered inline on one core
+versus spread over the QR process pool, page by page as the label endpoint does.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+LABELS = int(os.environ.get("LABELS", 420))
+
+
+def make_pages():
+    labels = [(f"ARTICLE:{uuid.uuid4()}:Article {i}", f"Article {i}") for i in range(LABELS)]
+    return [labels[i:i + server.LABELS_PER_PAGE] for i in range(0, len(labels), server.LABELS_PER_PAGE)]
+
+
+def bench_inline(pages):
+    start = time.perf_counter()
+    rendered = [server.render_label_page(page) for page in pages]
+    server.assemble_label_sheet(rendered)
+    return time.perf_counter() - start
+
+
+async def bench_pool(pages):
+    start = time.perf_counter()
+    rendered = await asyncio.gather(*[server.run_in_qr_pool(server.render_label_page, page) for page in pages])
+    await server.run_in_qr_pool(server.assemble_label_sheet, rendered)
+    return time.perf_counter() - start
+
+
+async def main():
+    pages = make_pages()
+    # Warm up the worker processes so spawn cost is not measured
+    await asyncio.gather(*[server.run_in_qr_pool(server.render_qr_png, "warmup") for _ in range(server.QR_POOL_SIZE)])
+
+    inline = bench_inline(pages)
+    pooled = await bench_pool(pages)
+    server.qr_executor.shutdown()
+
+    print(f"Stockify label benchmark: {LABELS} labels, {len(pages)} pages, {server.QR_POOL_SIZE} workers")
+    print(f"{'mode':<10}{'seconds':>10}{'labels/s':>12}")
+    print(f"{'inline':<10}{inline:>10.2f}{LABELS / inline:>12.1f}")
+    print(f"{'pool':<10}{pooled:>10.2f}{LABELS / pooled:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Stockify load test
+Replays the backend_test.py scenarios (login, list articles, create demande,
+approve, mouvements, dashboard) as weighted flows run by concurrent virtual
+users, then reports throughput and p50/p95/p99 latency per endpoint as JSON.
+Run it against a local backend and mongod seeded with create_test_data.py:
+
+    cd backend && uvicorn server:app --port 8001
+    python benchmarks/load_test.py
+
+Pass BASELINE=<previous report> to print the change in p95 and throughput
+per endpoint against an earlier run.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+BASE_URL = os.environ.get("STOCKIFY_URL", "http://localhost:8001")
+USERS = int(os.environ.get("USERS", 50))
+DURATION = float(os.environ.get("DURATION", 60))
+THINK_TIME = float(os.environ.get("THINK_TIME", 0))
+SEED = int(os.environ.get("SEED", 42))
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+OUTPUT = Path(os.environ.get("OUTPUT", RESULTS_DIR / f"load_test-{datetime.now():%Y%m%d-%H%M%S}.json"))
+BASELINE = os.environ.get("BASELINE")
+ADMIN = {"email": "admin@stockify.com", "password": "admin123"}
+USER = {"email": "user@stockify.com", "password": "user123"}
+STOCK = 1_000_000
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Recorder:
+    """Latencies and errors per endpoint, keyed by method and route template."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client, method, path, endpoint, expected=200, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.errors[endpoint] += 1
+            return None
+        self.latencies[endpoint].append((time.perf_counter() - start) * 1000)
+        if response.status_code != expected:
+            self.errors[endpoint] += 1
+            return None
+        return response
+
+    def report(self, elapsed):
+        endpoints = {}
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            latencies = self.latencies[endpoint] or [0.0]
+            endpoints[endpoint] = {
+                "requests": len(self.latencies[endpoint]),
+                "errors": self.errors[endpoint],
+                "throughput_rps": round(len(self.latencies[endpoint]) / elapsed, 2),
+                "mean_ms": round(sum(latencies) / len(latencies), 2),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(max(latencies), 2),
+            }
+        total = sum(len(latencies) for latencies in self.latencies.values())
+        return {
+            "base_url": BASE_URL,
+            "started_at": datetime.utcnow().isoformat(),
+            "users": USERS,
+            "duration_s": round(elapsed, 2),
+            "seed": SEED,
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+class Scenario:
+    """Shared state of a run: tokens from backend_test.py's users and articles to work on."""
+
+    def __init__(self, recorder, admin_headers, user_headers, article_ids, stock_article_id):
+        self.recorder = recorder
+        self.admin = admin_headers
+        self.user = user_headers
+        self.article_ids = article_ids
+        self.stock_article_id = stock_article_id
+
+    async def login(self, client, rng):
+        await self.recorder.call(client, "POST", "/api/auth/login", "POST /auth/login", json=rng.choice((ADMIN, USER)))
+
+    async def browse_articles(self, client, rng):
+        await self.recorder.call(client, "GET", "/api/articles", "GET /articles", headers=self.user)
+        article_id = rng.choice(self.article_ids)
+        await self.recorder.call(client, "GET", f"/api/articles/{article_id}", "GET /articles/{id}", headers=self.user)
+
+    async def create_demande(self, client, rng):
+        await self.recorder.call(client, "POST", "/api/demandes", "POST /demandes", headers=self.user,
+                                 json={"article_id": self.stock_article_id, "quantite_demandee": 1})
+
+    async def approve_demande(self, client, rng):
+        response = await self.recorder.call(client, "POST", "/api/demandes", "POST /demandes", headers=self.user,
+                                            json={"article_id": self.stock_article_id, "quantite_demandee": 1})
+        if response is not None:
+            await self.recorder.call(client, "PUT", f"/api/demandes/{response.json()['id']}/approve",
+                                     "PUT /demandes/{id}/approve", headers=self.admin)
+
+    async def mouvements(self, client, rng):
+        await self.recorder.call(client, "POST", "/api/mouvements", "POST /mouvements", headers=self.admin,
+                                 json={"article_id": self.stock_article_id, "type": "entree",
+                                       "quantite": rng.randint(1, 10), "raison": "Load test"})
+
+    async def dashboard(self, client, rng):
+        await self.recorder.call(client, "GET", "/api/dashboard/stats", "GET /dashboard/stats", headers=self.admin)
+        await self.recorder.call(client, "GET", "/api/dashboard/alerts", "GET /dashboard/alerts", headers=self.admin)
+
+    def flows(self):
+        return [
+            (self.browse_articles, 40),
+            (self.dashboard, 15),
+            (self.create_demande, 15),
+            (self.approve_demande, 10),
+            (self.mouvements, 10),
+            (self.login, 10),
+        ]
+
+
+async def setup(client):
+    tokens = []
+    for credentials in (ADMIN, USER):
+        response = await client.post("/api/auth/login", json=credentials)
+        response.raise_for_status()
+        tokens.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+    admin, user = tokens
+
+    response = await client.post("/api/articles", headers=admin, data={
+        "nom": "Article load test", "description": "Stock for load test demandes",
+        "quantite": str(STOCK), "quantite_min": "1",
+    })
+    response.raise_for_status()
+    stock_article_id = response.json()["id"]
+    response = await client.get("/api/articles", headers=user, params={"limit": 500, "fields": "id"})
+    response.raise_for_status()
+    article_ids = [article["id"] for article in response.json()]
+    return admin, user, article_ids, stock_article_id
+
+
+async def virtual_user(client, scenario, rng, deadline):
+    flows, weights = zip(*scenario.flows())
+    while time.perf_counter() < deadline:
+        flow = rng.choices(flows, weights)[0]
+        await flow(client, rng)
+        if THINK_TIME:
+            await asyncio.sleep(rng.expovariate(1 / THINK_TIME))
+
+
+def compare(report, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text())["endpoints"]
+    print(f"\nAgainst {baseline_path}")
+    print(f"{'endpoint':<30}{'p95 ms':>10}{'change':>9}{'req/s':>10}{'change':>9}")
+    for endpoint, stats in report["endpoints"].items():
+        before = baseline.get(endpoint)
+        if not before or not before["p95_ms"] or not before["throughput_rps"]:
+            continue
+        p95 = (stats["p95_ms"] / before["p95_ms"] - 1) * 100
+        rps = (stats["throughput_rps"] / before["throughput_rps"] - 1) * 100
+        print(f"{endpoint:<30}{stats['p95_ms']:>10.1f}{p95:>8.1f}%{stats['throughput_rps']:>10.1f}{rps:>8.1f}%")
+
+
+async def main():
+    limits = httpx.Limits(max_connections=USERS, max_keepalive_connections=USERS)
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=30) as client:
+        admin, user, article_ids, stock_article_id = await setup(client)
+        recorder = Recorder()
+        scenario = Scenario(recorder, admin, user, article_ids, stock_article_id)
+        print(f"Stockify load test: {USERS} users for {DURATION:.0f}s against {BASE_URL}")
+        try:
+            start = time.perf_counter()
+            deadline = start + DURATION
+            await asyncio.gather(*[
+                virtual_user(client, scenario, random.Random(SEED + i), deadline) for i in range(USERS)
+            ])
+            elapsed = time.perf_counter() - start
+        finally:
+            await client.delete(f"/api/articles/{stock_article_id}", headers=admin)
+
+    report = recorder.report(elapsed)
+    OUTPUT.parent.mkdir(parents=True, exist_ok=True)
+    OUTPUT.write_text(json.dumps(report, indent=2))
+
+    print(f"{'endpoint':<30}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for endpoint, stats in report["endpoints"].items():
+        print(f"{endpoint:<30}{stats['throughput_rps']:>9.1f}{stats['p50_ms']:>9.1f}"
+              f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['errors']:>8}")
+    print(f"{'total':<30}{report['throughput_rps']:>9.1f}{'':>27}{report['errors']:>8}")
+    print(f"Report written to {OUTPUT}")
+    if BASELINE:
+        compare(report, BASELINE)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Stockify login throughput benchmark
+Fires bursts of concurrent logins against a running backend while probing an
+unrelated endpoint, to check that bcrypt no longer stalls the event loop.
+Requires the test users from create_test_data.py.
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+BASE_URL = os.environ.get("STOCKIFY_URL", "http://localhost:8001")
+CONCURRENT_LOGINS = int(os.environ.get("CONCURRENT_LOGINS", 50))
+PROBES = int(os.environ.get("PROBES", 200))
+CREDENTIALS = {"email": "admin@stockify.com", "password": "admin123"}
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def probe(client, headers, count):
+    """Latency of a cheap authenticated request, in milliseconds."""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get("/api/auth/me", headers=headers)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def login(client):
+    response = await client.post("/api/auth/login", json=CREDENTIALS)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def main():
+    limits = httpx.Limits(max_connections=CONCURRENT_LOGINS + 10)
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=60) as client:
+        headers = {"Authorization": f"Bearer {await login(client)}"}
+
+        idle = await probe(client, headers, PROBES)
+
+        start = time.perf_counter()
+        logins = asyncio.gather(*[login(client) for _ in range(CONCURRENT_LOGINS)])
+        under_load, _ = await asyncio.gather(probe(client, headers, PROBES), logins)
+        elapsed = time.perf_counter() - start
+
+    print(f"Stockify login benchmark against {BASE_URL}")
+    print(f"Logins: {CONCURRENT_LOGINS} concurrent in {elapsed:.2f}s ({CONCURRENT_LOGINS / elapsed:.1f} logins/s)")
+    print(f"{'probe /api/auth/me':<22}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for label, values in (("idle", idle), ("during logins", under_load)):
+        print(f"{label:<22}{statistics.median(values):>10.1f}{percentile(values, 95):>10.1f}{max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Stockify metrics overhead benchmark
+Requests per second on GET /api/articles with the metrics middleware and
+Mongo command listener enabled and disabled, both on a cache hit and with the
+articles cache cleared before every request so each call reaches MongoDB.
+Runs the app in-process through httpx's ASGI transport against MONGO_URL.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+
+ARTICLES = int(os.environ.get("ARTICLES", 1000))
+REQUESTS = int(os.environ.get("REQUESTS", 2000))
+RUNS = int(os.environ.get("RUNS", 3))
+
+
+async def seed(db):
+    await db.articles.drop()
+    await db.users.drop()
+    now = datetime.utcnow()
+    await db.articles.insert_many([{
+        "id": str(uuid.uuid4()), "nom": f"Article {i}", "description": "Article de test",
+        "image": None, "thumbnail": None, "code_qr": None, "quantite": i % 50, "quantite_min": 5,
+        "date_expiration": None, "created_at": now, "updated_at": now,
+    } for i in range(ARTICLES)])
+    user = server.User(nom="Bench", email="bench@bench.local", password_hash="x", role=server.UserRole.ADMIN)
+    await db.users.insert_one(user.dict())
+    return server.create_access_token({"sub": user.id})
+
+
+async def bench(http, headers, enabled, cached):
+    server.metrics.enabled = enabled
+    best = float("inf")
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            if not cached:
+                server.articles_cache.clear()
+            response = await http.get("/api/articles", headers=headers)
+            response.raise_for_status()
+        best = min(best, time.perf_counter() - start)
+    return REQUESTS / best
+
+
+async def main():
+    db = server.client[os.environ.get("BENCH_DB_NAME", "stockify_bench")]
+    server.db = db
+    try:
+        token = await seed(db)
+        headers = {"Authorization": f"Bearer {token}"}
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            print(f"Stockify metrics overhead: GET /api/articles over {ARTICLES} articles, "
+                  f"{REQUESTS} requests, best of {RUNS}")
+            print(f"{'path':<12}{'metrics off':>14}{'metrics on':>14}{'overhead':>10}")
+            for cached in (True, False):
+                off = await bench(http, headers, enabled=False, cached=cached)
+                on = await bench(http, headers, enabled=True, cached=cached)
+                label = "cache hit" if cached else "cache miss"
+                print(f"{label:<12}{off:>12.0f}/s{on:>12.0f}/s{(off / on - 1) * 100:>9.1f}%")
+    finally:
+        await server.client.drop_database(db.name)
+        server.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
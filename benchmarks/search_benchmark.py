@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Stockify search benchmark
+Builds the in-process article search index over a synthetic catalogue
+(100k articles by default) and reports the index build time and the
+search latency percentiles per query type.
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+ARTICLES = int(os.environ.get("ARTICLES", 100000))
+RUNS = int(os.environ.get("RUNS", 200))
+
+PRODUCTS = ["Câble", "Écran", "Clavier", "Souris", "Cartouche", "Papier", "Stylo", "Agrafeuse",
+            "Chargeur", "Ordinateur", "Imprimante", "Classeur", "Enveloppe", "Batterie", "Étiquette"]
+QUALIFIERS = ["HDMI", "USB-C", "sans fil", "ergonomique", "noir", "couleur", "A4", "A3", "Dell", "HP",
+              "Logitech", "Lenovo", "recyclé", "premium", "2m", "24 pouces", "mécanique", "rechargeable"]
+QUERIES = {
+    "prefix": ["cab", "ecr", "cla", "imp", "eti"],
+    "accent": ["câble hdmi", "écran dell", "étiquette"],
+    "fuzzy": ["cabel", "imprimente", "clavir usb"],
+    "short": ["c", "so"],
+}
+
+
+def make_article(rng, i):
+    nom = f"{rng.choice(PRODUCTS)} {rng.choice(QUALIFIERS)} {rng.choice(QUALIFIERS)} {i}"
+    description = " ".join(rng.choice(QUALIFIERS) for _ in range(6))
+    return {"id": str(uuid.uuid4()), "nom": nom, "description": description}
+
+
+def main():
+    rng = random.Random(42)
+    index = server.SearchIndex()
+
+    start = time.perf_counter()
+    for i in range(ARTICLES):
+        index.add(make_article(rng, i))
+    build = time.perf_counter() - start
+
+    print(f"Stockify search benchmark: {ARTICLES} articles, index built in {build:.2f}s ({len(index.grams)} trigrams)")
+    print(f"{'query type':<12}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for kind, queries in QUERIES.items():
+        latencies = []
+        for run in range(RUNS):
+            query = queries[run % len(queries)]
+            start = time.perf_counter()
+            index.search(query, server.SEARCH_PAGE_SIZE)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        print(f"{kind:<12}{statistics.median(latencies):>10.2f}{latencies[int(len(latencies) * 0.95)]:>10.2f}{latencies[-1]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Stockify serialization benchmark
+Rows serialized per second for the article list: the former path (one
+ArticleResponse per row, re-validated through response_model, then
+jsonable_encoder + json) against the orjson row path, with and without a
+sparse fieldset.
+"""
+
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import orjson  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+import server  # noqa: E402
+
+ROWS = int(os.environ.get("ROWS", 10000))
+RUNS = int(os.environ.get("RUNS", 5))
+
+
+def make_rows():
+    now = datetime.utcnow()
+    return [{
+        "id": str(uuid.uuid4()), "nom": f"Article {i}", "description": "Câble HDMI 2.1 - 2m " * 4,
+        "image": None, "thumbnail": None, "code_qr": server.qr_code_url(str(i)), "quantite": i % 50,
+        "quantite_min": 5, "date_expiration": None, "created_at": now, "updated_at": now,
+    } for i in range(ROWS)]
+
+
+def before(rows):
+    adapter = TypeAdapter(List[server.ArticleResponse])
+    articles = [server.ArticleResponse(**row) for row in rows]
+    validated = adapter.validate_python([article.dict() for article in articles])
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def after(rows):
+    return orjson.dumps(server.project_rows(rows, server.parse_fields(None, server.ArticleResponse)))
+
+
+def after_sparse(rows):
+    return orjson.dumps(server.project_rows(rows, server.parse_fields("nom,quantite", server.ArticleResponse)))
+
+
+def main():
+    rows = make_rows()
+    print(f"Stockify serialization benchmark: {ROWS} articles, best of {RUNS}")
+    print(f"{'path':<34}{'rows/s':>12}{'bytes':>12}")
+    for name, encode in (("pydantic + response_model", before), ("orjson rows", after),
+                         ("orjson rows ?fields=nom,quantite", after_sparse)):
+        best = float("inf")
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            body = encode(rows)
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:<34}{ROWS / best:>12.0f}{len(body):>12}")
+
+
+if __name__ == "__main__":
+    main()
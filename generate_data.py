@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Stockify synthetic data generator
+Extends create_test_data.py to performance-testing volumes: creates its admin
+and user accounts, then generates users, articles, demandes, mouvements and
+historique entries in parallel worker processes with batched insert_many.
+
+Popularity is skewed (a few articles and users account for most demandes and
+mouvements), activity is weighted towards recent dates, and perishable
+articles get expiry dates around today. The same --seed always produces the
+same documents, whatever the number of workers.
+
+    python generate_data.py --articles 100000 --users 10000 --demandes 2000000 \\
+        --mouvements 2000000 --historique 2000000 --workers 8 --drop
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import multiprocessing
+import os
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+
+import server  # noqa: E402
+import create_test_data  # noqa: E402
+from pymongo import MongoClient  # noqa: E402
+from pymongo.errors import BulkWriteError  # noqa: E402
+
+COLLECTIONS = ("users", "articles", "demandes", "mouvements", "historique_actions")
+ADMIN_EVERY = 50
+PASSWORD = "password123"
+
+PRENOMS = ["Marie", "Jean", "Camille", "Lucas", "Léa", "Hugo", "Chloé", "Louis", "Emma", "Nathan",
+           "Manon", "Thomas", "Inès", "Julien", "Sarah", "Antoine", "Clara", "Mathis", "Zoé", "Karim"]
+NOMS = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau",
+        "Simon", "Laurent", "Lefèvre", "Michel", "Garcia", "David", "Bertrand", "Roux", "Vincent", "Fournier"]
+PRODUITS = [
+    ("Ordinateur portable", False), ("Souris sans fil", False), ("Clavier", False), ("Écran 24 pouces", False),
+    ("Câble HDMI", False), ("Câble USB-C", False), ("Casque audio", False), ("Webcam", False),
+    ("Disque SSD", False), ("Clé USB", False), ("Chaise de bureau", False), ("Lampe de bureau", False),
+    ("Cartouche d'encre", True), ("Toner laser", True), ("Papier A4", False), ("Stylos", False),
+    ("Piles AA", True), ("Gel hydroalcoolique", True), ("Masques chirurgicaux", True), ("Café en grains", True),
+    ("Lingettes désinfectantes", True), ("Colle", True), ("Ruban adhésif", False), ("Classeurs", False),
+]
+MARQUES = ["Dell", "HP", "Logitech", "Lenovo", "Samsung", "Bic", "Clairefontaine", "Duracell", "3M", "Philips"]
+RAISONS_ENTREE = ["Réception fournisseur", "Retour de prêt", "Inventaire", "Transfert entrant"]
+RAISONS_SORTIE = ["Demande approuvée", "Casse", "Transfert sortant", "Inventaire", "Péremption"]
+ACTIONS = [("CREATE", "Demande", 45), ("APPROVE", "Demande", 25), ("REJECT", "Demande", 8),
+           ("CREATE", "Mouvement", 12), ("UPDATE", "Article", 7), ("CREATE", "Article", 2), ("DELETE", "Article", 1)]
+ACTION_VERBS = {"CREATE": "Créé", "APPROVE": "Approuvé", "REJECT": "Rejeté", "UPDATE": "Modifié", "DELETE": "Supprimé"}
+
+
+def doc_id(seed: int, kind: str, index: int) -> str:
+    """Deterministic uuid of the ``index``-th document of ``kind``, computable from any worker."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"stockify:{seed}:{kind}:{index}"))
+
+
+@lru_cache(maxsize=None)
+def zipf_weights(n: int, exponent: float) -> list:
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(n)))
+
+
+def zipf_index(rng: random.Random, n: int, exponent: float) -> int:
+    """Skewed pick in ``range(n)``; popular ranks are scattered rather than the oldest documents."""
+    weights = zipf_weights(n, exponent)
+    rank = bisect.bisect_left(weights, rng.random() * weights[-1])
+    return (rank * 7919) % n if n % 7919 else rank
+
+
+def recent_date(rng: random.Random, now: datetime, days: int) -> datetime:
+    """A date within the last ``days`` days, denser towards today."""
+    return now - timedelta(days=days * rng.random() ** 2)
+
+
+def make_user(rng, i, config, now):
+    prenom, nom = rng.choice(PRENOMS), rng.choice(NOMS)
+    created_at = recent_date(rng, now, config["days"])
+    return {
+        "id": doc_id(config["seed"], "user", i),
+        "nom": f"{prenom} {nom}",
+        "email": f"{prenom.lower()}.{nom.lower()}.{i}@stockify.local",
+        "password_hash": config["password_hash"],
+        "role": "admin" if i % ADMIN_EVERY == 0 else "user",
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def make_article(rng, i, config, now):
+    produit, perishable = rng.choice(PRODUITS)
+    marque = rng.choice(MARQUES)
+    article_id = doc_id(config["seed"], "article", i)
+    quantite_min = rng.randint(1, 20)
+    # About one article in eight is at or below its minimum
+    quantite = rng.randint(0, quantite_min) if rng.random() < 0.12 else int(quantite_min + rng.lognormvariate(3, 1))
+    created_at = recent_date(rng, now, config["days"])
+    return {
+        "id": article_id,
+        "nom": f"{produit} {marque} {i}",
+        "description": f"{produit} {marque} - référence {rng.randint(1000, 9999)}",
+        "image": None,
+        "thumbnail": None,
+        "code_qr": server.qr_code_url(article_id),
+        "quantite": quantite,
+        "quantite_min": quantite_min,
+        "date_expiration": now + timedelta(days=rng.uniform(-30, 365)) if perishable else None,
+        "created_at": created_at,
+        "updated_at": created_at + (now - created_at) * rng.random(),
+    }
+
+
+def make_demande(rng, i, config, now):
+    created_at = recent_date(rng, now, config["days"])
+    if now - created_at < timedelta(days=7) and rng.random() < 0.6:
+        statut = "pending"
+    else:
+        statut = "approved" if rng.random() < 0.75 else "rejected"
+    return {
+        "id": doc_id(config["seed"], "demande", i),
+        "user_id": doc_id(config["seed"], "user", zipf_index(rng, config["users"], 0.9)),
+        "article_id": doc_id(config["seed"], "article", zipf_index(rng, config["articles"], 1.1)),
+        "quantite_demandee": min(1 + int(rng.expovariate(0.5)), 20),
+        "statut": statut,
+        "date_demande": created_at,
+        "created_at": created_at,
+        "updated_at": created_at if statut == "pending" else created_at + timedelta(hours=rng.uniform(0.1, 72)),
+    }
+
+
+def make_mouvement(rng, i, config, now):
+    entree = rng.random() < 0.35
+    admins = (config["users"] + ADMIN_EVERY - 1) // ADMIN_EVERY
+    return {
+        "id": doc_id(config["seed"], "mouvement", i),
+        "article_id": doc_id(config["seed"], "article", zipf_index(rng, config["articles"], 1.1)),
+        "type": "entree" if entree else "sortie",
+        "quantite": rng.randint(5, 200) if entree else min(1 + int(rng.expovariate(0.5)), 20),
+        "utilisateur_id": doc_id(config["seed"], "user", rng.randrange(admins) * ADMIN_EVERY),
+        "raison": rng.choice(RAISONS_ENTREE if entree else RAISONS_SORTIE),
+        "created_at": recent_date(rng, now, config["days"]),
+    }
+
+
+def make_historique(rng, i, config, now):
+    action, cible_type, _ = rng.choices(ACTIONS, [weight for _, _, weight in ACTIONS])[0]
+    kind = cible_type.lower()
+    cible_id = doc_id(config["seed"], kind, rng.randrange(config[f"{kind}s"] or 1))
+    return {
+        "id": doc_id(config["seed"], "historique", i),
+        "user_id": doc_id(config["seed"], "user", zipf_index(rng, config["users"], 0.9)),
+        "action": action,
+        "cible_type": cible_type,
+        "cible_id": cible_id,
+        "description": f"{ACTION_VERBS[action]} {kind} #{cible_id}",
+        "created_at": recent_date(rng, now, config["days"]),
+    }
+
+
+GENERATORS = {
+    "users": make_user,
+    "articles": make_article,
+    "demandes": make_demande,
+    "mouvements": make_mouvement,
+    "historique_actions": make_historique,
+}
+
+worker_db = None
+
+
+def generate_batch(collection: str, start: int, count: int, config: dict) -> int:
+    """Generate and insert documents ``start`` to ``start + count``. Runs in a worker process.
+
+    Returns the number inserted: rerunning with the same seed without --drop
+    skips the documents that already exist.
+    """
+    global worker_db
+    if worker_db is None:
+        worker_db = MongoClient(server.mongo_url)[config["db_name"]]
+    rng = random.Random(f"{config['seed']}:{collection}:{start}")
+    now = config["now"]
+    make = GENERATORS[collection]
+    documents = [make(rng, i, config, now) for i in range(start, start + count)]
+    try:
+        return len(worker_db[collection].insert_many(documents, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        return e.details["nInserted"]
+
+
+def generate_collection(executor, collection: str, total: int, config: dict) -> Tuple[int, float]:
+    start = time.perf_counter()
+    batch_size = config["batch_size"]
+    futures = [
+        executor.submit(generate_batch, collection, offset, min(batch_size, total - offset), config)
+        for offset in range(0, total, batch_size)
+    ]
+    inserted = sum(future.result() for future in futures)
+    return inserted, time.perf_counter() - start
+
+
+async def rebuild_derived_state():
+    """Indexes, dashboard counters, alerts and the articles cache version the server would otherwise keep up to date itself."""
+    await server.ensure_indexes()
+    await server.rebuild_dashboard_counters()
+    await server.rebuild_alerts()
+    await server.articles_version.bump()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Stockify data")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--articles", type=int, default=10000)
+    parser.add_argument("--demandes", type=int, default=100000)
+    parser.add_argument("--mouvements", type=int, default=100000)
+    parser.add_argument("--historique", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=365, help="history spread over the last DAYS days")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--drop", action="store_true", help="drop the generated collections first")
+    args = parser.parse_args()
+
+    if args.users < 1 or args.articles < 1:
+        parser.error("--users and --articles must be at least 1")
+
+    volumes = {
+        "users": args.users, "articles": args.articles, "demandes": args.demandes,
+        "mouvements": args.mouvements, "historique_actions": args.historique,
+    }
+    config = {
+        "seed": args.seed, "days": args.days, "batch_size": args.batch_size, "db_name": server.db.name,
+        "now": datetime.utcnow().replace(microsecond=0), "password_hash": create_test_data.hash_password(PASSWORD),
+        "users": args.users, "articles": args.articles, "demandes": args.demandes, "mouvements": args.mouvements,
+    }
+
+    print(f"Generating Stockify data in {server.db.name} with {args.workers} workers, seed {args.seed}")
+    try:
+        if args.drop:
+            for collection in COLLECTIONS + ("alerts", "counters"):
+                await server.db[collection].drop()
+
+        report = []
+        total_start = time.perf_counter()
+        # Spawned rather than forked: the server's Motor client has already connected for --drop
+        spawn = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=spawn) as executor:
+            for collection, total in volumes.items():
+                if total:
+                    inserted, elapsed = generate_collection(executor, collection, total, config)
+                    report.append((collection, inserted, elapsed))
+                    print(f"{collection:<20}{inserted:>12,}{elapsed:>10.1f}s{inserted / elapsed:>12,.0f} docs/s")
+        total_docs = sum(total for _, total, _ in report)
+        total_elapsed = time.perf_counter() - total_start
+        print(f"{'total':<20}{total_docs:>12,}{total_elapsed:>10.1f}s{total_docs / total_elapsed:>12,.0f} docs/s")
+
+        await create_test_data.create_test_users()
+        start = time.perf_counter()
+        await rebuild_derived_state()
+        print(f"Indexes, counters and alerts rebuilt in {time.perf_counter() - start:.1f}s")
+        print(f"Generated users log in with password {PASSWORD}")
+    finally:
+        server.client.close()
+        create_test_data.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Stockify bulk import
+Streams articles or mouvements from a CSV/NDJSON file into the database using
+the same validation and batched writes as POST /api/import/{kind}.
+
+    python import_data.py mouvements erp_export.ndjson
+    python import_data.py articles catalogue.csv --user admin@stockify.com
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+
+import server  # noqa: E402
+
+
+async def iter_file_lines(path: Path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bulk import into Stockify")
+    parser.add_argument("kind", choices=[kind.value for kind in server.ImportKind])
+    parser.add_argument("file", type=Path)
+    parser.add_argument("--format", choices=[fmt.value for fmt in server.ImportFormat])
+    parser.add_argument("--user", default="admin@stockify.com", help="email of the admin recorded in the history")
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.file.suffix.lower() in (".ndjson", ".jsonl") else "csv")
+
+    try:
+        user = await server.db.users.find_one({"email": args.user})
+        if not user:
+            print(f"User not found: {args.user}")
+            return 1
+        records = server.parse_records(iter_file_lines(args.file), server.ImportFormat(fmt))
+        report = await server.import_records(server.ImportKind(args.kind), records, server.User(**user))
+    finally:
+        server.client.close()
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Stockify index advisor
+Creates the required indexes and reports every route query shape that still
+needs a collection scan (COLLSCAN). Exits 1 if any does, except the shapes
+marked as expected scans.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+
+import server  # noqa: E402
+
+
+async def main():
+    if "--no-create" not in sys.argv:
+        await server.ensure_indexes()
+
+    report = await server.explain_query_shapes()
+    for entry in report:
+        status = ("expected" if entry["expected_scan"] else "COLLSCAN") if entry["collscan"] else "ok"
+        print(f"{status:<9} {entry['route']:<45} {entry['collection']:<20} {' > '.join(entry['stages'])}")
+
+    collscans = [entry for entry in report if entry["collscan"] and not entry["expected_scan"]]
+    expected = sum(entry["collscan"] and entry["expected_scan"] for entry in report)
+    print(f"\n{len(collscans)}/{len(report)} query shapes use a collection scan ({expected} expected)")
+    server.client.close()
+    return 1 if collscans else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Stockify QR code migration
+Drops the base64 PNG data URIs inlined in articles.code_qr and points them at
+GET /api/articles/{id}/qr.png instead, shrinking every article list response.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+
+import server  # noqa: E402
+
+
+async def main():
+    try:
+        migrated = await server.migrate_inline_qr_codes()
+        print(f"Migrated {migrated} articles to QR code URLs")
+    finally:
+        server.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())